@@ -12,6 +12,7 @@ import argparse
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 
 from mailbackup import db
 from mailbackup.config import load_settings
@@ -42,8 +43,8 @@ def build_parser() -> argparse.ArgumentParser:
     return p
 
 
-def main():
-    args = build_parser().parse_args()
+def main(argv: Optional[list[str]] = None):
+    args = build_parser().parse_args(argv)
     settings = load_settings(args.config)
 
     # Initialize central logger once via logging.setup_logger, then obtain module logger
@@ -6,7 +6,7 @@ config.py
 Configuration loading for the mailbackup package.
 
 Supports:
-- TOML (preferred) using stdlib tomllib (Python 3.11+) or if not available, falls back to .ini
+- TOML (preferred) using stdlib tomllib
 - INI using configparser
 
 Precedence:
@@ -21,15 +21,15 @@ Precedence:
 
 from __future__ import annotations
 
-import configparser
 import os
 import sys
+import tomllib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Settings:
     # Core paths
     maildir: Path
@@ -55,6 +55,7 @@ class Settings:
     max_hash_threads: int
     max_upload_workers: int
     max_extract_workers: int
+    extract_processes: int
     upload_batch_size: int
 
     # Logging
@@ -88,26 +89,14 @@ DEFAULT_LOCATIONS = [
 
 
 def _load_toml(path: Path) -> Dict[str, Any]:
-    # Prefer stdlib tomllib (3.11+), else fallback to third-party tomli if available.
-    try:
-        import tomllib  # type: ignore
-        loader = tomllib.load
-    except Exception:
-        try:
-            import tomli  # type: ignore
-            loader = tomli.load
-        except Exception:
-            raise RuntimeError(
-                f"TOML config {path} requested but no TOML parser available. "
-                f"Install Python 3.11+ or the 'tomli' package, or use an INI config."
-            )
-
     with open(path, "rb") as f:
-        data = loader(f)
-    return data
+        return tomllib.load(f)
 
 
 def _load_ini(path: Path) -> Dict[str, Any]:
+    # Imported here so the common TOML path does not pay for configparser at startup
+    import configparser
+
     cp = configparser.ConfigParser()
     cp.read(path)
     data: Dict[str, Any] = {}
@@ -123,15 +112,19 @@ def _load_ini(path: Path) -> Dict[str, Any]:
     return data
 
 
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "on", "y", "t"})
+_FALSE_STRINGS = frozenset({"0", "false", "no", "off", "n", "f"})
+
+
 def _coerce_bool(v: Any, default: bool) -> bool:
     if v is None:
         return default
     if isinstance(v, bool):
         return v
     s = str(v).strip().lower()
-    if s in ("1", "true", "yes", "on"):
+    if s in _TRUE_STRINGS:
         return True
-    if s in ("0", "false", "no", "off"):
+    if s in _FALSE_STRINGS:
         return False
     return default
 
@@ -145,6 +138,83 @@ def _coerce_int(v: Any, default: int) -> int:
         return default
 
 
+def _coerce_str(v: Any, default: str) -> str:
+    return default if v is None else str(v)
+
+
+def _coerce_path(v: Any, default: str) -> Path:
+    return Path(default if v is None else v)
+
+
+def _coerce_remote(v: Any, default: str) -> str:
+    return _coerce_str(v, default).rstrip("/")
+
+
+# Every Settings field: (name, config keys tried in order, coercer, default).
+# Keys are flat names or "section.key" for nested TOML tables / INI-style sections.
+_FIELD_SPEC: tuple[tuple[str, tuple[str, ...], Callable[[Any, Any], Any], Any], ...] = (
+    # Paths
+    ("maildir", ("maildir", "paths.maildir"), _coerce_path, "/srv/mailbackup/maildir"),
+    ("attachments_dir", ("attachments_dir", "paths.attachments_dir"), _coerce_path, "/srv/mailbackup/attachments"),
+    ("remote", ("remote", "paths.remote"), _coerce_remote, "nextcloud:Backups/Email"),
+    ("db_path", ("db_path", "paths.db_path"), _coerce_path, "/srv/mailbackup/state.db"),
+    ("log_path", ("log_path", "paths.log_path"), _coerce_path, "/var/log/mailbackup/sync.log"),
+    ("tmp_dir", ("tmp_dir", "paths.tmp_dir"), _coerce_path, "/srv/mailbackup/staging"),
+    ("archive_dir", ("archive_dir", "paths.archive_dir"), _coerce_path, "/srv/mailbackup/archives"),
+    ("manifest_path", ("manifest_path", "paths.manifest_path"), _coerce_path, "/srv/mailbackup/manifest.csv"),
+
+    # Archival
+    ("retention_years", ("retention_years", "archival.retention_years"), _coerce_int, 2),
+    ("keep_local_after_archive", ("keep_local_after_archive", "archival.keep_local_after_archive"),
+     _coerce_bool, False),
+
+    # Integrity
+    ("verify_integrity", ("verify_integrity", "integrity.verify_integrity"), _coerce_bool, True),
+    ("repair_on_failure", ("repair_on_failure", "integrity.repair_on_failure"), _coerce_bool, True),
+
+    # Manifest
+    ("manifest_remote_name", ("manifest_remote_name", "manifest.remote_name"), _coerce_str, "manifest.csv"),
+    ("max_manifest_conflict_retries", ("max_manifest_conflict_retries", "manifest.max_conflict_retries"),
+     _coerce_int, 3),
+
+    # Performance
+    ("max_upload_workers", ("max_upload_workers", "performance.max_upload_workers"), _coerce_int, 4),
+    ("max_extract_workers", ("max_extract_workers", "performance.max_extract_workers"), _coerce_int, 1),
+    ("extract_processes", ("extract_processes", "performance.extract_processes"), _coerce_int, 0),
+    ("upload_batch_size", ("upload_batch_size", "performance.upload_batch_size"), _coerce_int, 100),
+    ("max_hash_threads", ("max_hash_threads", "performance.max_hash_workers"), _coerce_int, 8),
+
+    # Logging
+    ("status_interval", ("status_interval", "logging.status_interval"), _coerce_int, 300),
+    ("log_level", ("log_level", "logging.log_level"), _coerce_str, "INFO"),
+    ("rotate_by_time", ("rotate_by_time", "logging.rotate_by_time"), _coerce_bool, True),
+    ("max_log_files", ("max_log_files", "logging.max_log_files"), _coerce_int, 10),
+    ("max_log_size", ("max_log_size", "logging.max_log_size"), _coerce_int, 50 * 1024 * 1024),
+
+    # Fetching
+    ("fetch_command", ("fetch_command", "fetching.command"), _coerce_str, "mbsync -V -a"),
+
+    # rclone
+    ("rclone_log_level", ("rclone_log_level", "rclone.log_level"), _coerce_str, "INFO"),
+    ("rclone_transfers", ("rclone_transfers", "rclone.transfers"), _coerce_int, 8),
+    ("rclone_multi_thread_streams", ("rclone_multi_thread_streams", "rclone.multi_thread_streams"), _coerce_int, 4),
+)
+
+
+def _pick(data: Dict[str, Any], keys: tuple[str, ...]) -> Any:
+    """Return the first value found for keys, trying flat keys before nested "section.key" ones; None if absent."""
+    for k in keys:
+        if k in data:
+            return data[k]
+    for k in keys:
+        top, sep, sub = k.partition(".")
+        if sep:
+            section = data.get(top)
+            if isinstance(section, dict) and sub in section:
+                return section[sub]
+    return None
+
+
 def load_settings(config_path: Optional[Path] = None) -> Settings:
     data: Dict[str, Any] = {}
 
@@ -174,114 +244,11 @@ def load_settings(config_path: Optional[Path] = None) -> Settings:
         else:
             data = _load_ini(source_path)
 
-    # Flatten possible [paths] etc.
-    # We'll accept either flat keys or nested dicts
-    def pick(*keys: str, default: Any = None) -> Any:
-        for k in keys:
-            if k in data:
-                return data[k]
-        # nested
-        for k in keys:
-            parts = k.split(".")
-            if len(parts) == 2:
-                top, sub = parts
-                if top in data and isinstance(data[top], dict):
-                    if sub in data[top]:
-                        return data[top][sub]
-        return default
-
-    # Paths
-    maildir = Path(pick("maildir", "paths.maildir", default="/srv/mailbackup/maildir"))
-    attachments_dir = Path(pick("attachments_dir", "paths.attachments_dir", default="/srv/mailbackup/attachments"))
-    remote = str(pick("remote", "paths.remote", default="nextcloud:Backups/Email")).rstrip("/")
-    db_path = Path(pick("db_path", "paths.db_path", default="/srv/mailbackup/state.db"))
-    log_path = Path(pick("log_path", "paths.log_path", default="/var/log/mailbackup/sync.log"))
-    tmp_dir = Path(pick("tmp_dir", "paths.tmp_dir", default="/srv/mailbackup/staging"))
-    archive_dir = Path(pick("archive_dir", "paths.archive_dir", default="/srv/mailbackup/archives"))
-    manifest_path = Path(pick("manifest_path", "paths.manifest_path", default="/srv/mailbackup/manifest.csv"))
-
-    # Archival
-    retention_years = _coerce_int(pick("retention_years", "archival.retention_years", default=2), 2)
-    keep_local_after_archive = _coerce_bool(
-        pick("keep_local_after_archive", "archival.keep_local_after_archive", default=False), False)
-
-    # Integrity
-    verify_integrity = _coerce_bool(pick("verify_integrity", "integrity.verify_integrity", default=True), True)
-    repair_on_failure = _coerce_bool(pick("repair_on_failure", "integrity.repair_on_failure", default=True), True)
-
-    # Manifest
-    manifest_remote_name = str(pick("manifest_remote_name", "manifest.remote_name", default="manifest.csv"))
-    max_manifest_conflict_retries = _coerce_int(
-        pick("max_manifest_conflict_retries", "manifest.max_conflict_retries", default=3), 3
-    )
-
-    # performance tuning (new)
-    max_upload_workers = _coerce_int(pick("max_upload_workers", "performance.max_upload_workers", default=4), 4)
-    max_extract_workers = _coerce_int(pick("max_extract_workers", "performance.max_extract_workers", default=1), 1)
-    upload_batch_size = _coerce_int(pick("upload_batch_size", "performance.upload_batch_size", default=100), 100)
-    max_hash_threads = _coerce_int(pick("max_hash_threads", "performance.max_hash_workers", default=8), 8)
-
-    # logging
-    status_interval = _coerce_int(pick("status_interval", "logging.status_interval", default=300), 300)
-    log_level = str(pick("log_level", "logging.log_level", default="INFO"))
-    rotate_by_time = _coerce_bool(pick("rotate_by_time", "logging.rotate_by_time", default=True), True)
-    max_log_files = _coerce_int(pick("max_log_files", "logging.max_log_files", default=10), 10)
-    max_log_size = _coerce_int(pick("max_log_size", "logging.max_log_size", default=50 * 1024 * 1024), 50 * 1024 * 1024)
-
-    # fetching
-    fetch_command = str(pick("fetch_command", "fetching.command", default="mbsync -V -a"))
-
-    # rclone
-    rclone_log_level = str(pick("rclone_log_level", "rclone.log_level", default="INFO"))
-    rclone_transfers = _coerce_int(pick("rclone_transfers", "rclone.transfers", default=8), 8)
-    rclone_multi_thread_streams = _coerce_int(
-        pick("rclone_multi_thread_streams", "rclone.multi_thread_streams", default=4), 4)
+    # One pass over the field table; flat keys or nested dicts are both accepted
+    values = {name: coerce(_pick(data, keys), default) for name, keys, coerce, default in _FIELD_SPEC}
 
     from mailbackup.rclone import set_rclone_defaults
 
-    set_rclone_defaults(rclone_log_level, rclone_transfers, rclone_multi_thread_streams)
-
-    return Settings(
-        # Paths
-        maildir=maildir,
-        attachments_dir=attachments_dir,
-        remote=remote,
-        db_path=db_path,
-        log_path=log_path,
-        tmp_dir=tmp_dir,
-        archive_dir=archive_dir,
-        manifest_path=manifest_path,
-
-        # Archival
-        retention_years=retention_years,
-        keep_local_after_archive=keep_local_after_archive,
-
-        # Integrity
-        verify_integrity=verify_integrity,
-        repair_on_failure=repair_on_failure,
-
-        # Manifest
-        manifest_remote_name=manifest_remote_name,
-        max_manifest_conflict_retries=max_manifest_conflict_retries,
-
-        # Performance
-        max_hash_threads=max_hash_threads,
-        max_upload_workers=max_upload_workers,
-        max_extract_workers=max_extract_workers,
-        upload_batch_size=upload_batch_size,
-
-        # Logging
-        status_interval=status_interval,
-        rotate_by_time=rotate_by_time,
-        max_log_files=max_log_files,
-        max_log_size=max_log_size,
-        log_level=log_level,
-
-        # Fetching
-        fetch_command=fetch_command,
-
-        # rclone
-        rclone_log_level=rclone_log_level,
-        rclone_transfers=rclone_transfers,
-        rclone_multi_thread_streams=rclone_multi_thread_streams,
-    )
+    set_rclone_defaults(values["rclone_log_level"], values["rclone_transfers"], values["rclone_multi_thread_streams"])
+
+    return Settings(**values)
@@ -9,23 +9,44 @@ SQLite access layer:
 - mark synced
 - fetch synced
 - mark archived
+- batched processed upserts and remote_path updates
+- local file fingerprint cache keyed by (path, size, mtime)
 
-Uses thread-local connections to avoid cross-thread SQLite errors.
+Uses thread-local connections to avoid cross-thread SQLite errors; all of them
+are closed (and the WAL checkpointed) at interpreter exit.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
 import sqlite3
 import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Self, Tuple
 
 from mailbackup.logger import get_logger
-from mailbackup.utils import parse_year_and_ts
 
 _thread_local = threading.local()
 
+# Every connection handed out by get_connection, across threads, so they can be closed at exit
+_open_conns: set[sqlite3.Connection] = set()
+_open_conns_lock = threading.Lock()
+
+# Rows pulled per fetchmany() call when streaming large result sets
+FETCH_CHUNK_SIZE = 1000
+
+# Per-connection page cache, in KiB (negative cache_size means KiB rather than pages)
+CACHE_SIZE_KIB = 64000
+
+# Unsynced, non-spam rows; served by idx_processed_synced_at
+FETCH_UNSYNCED_SQL = """
+    SELECT *
+    FROM processed
+    WHERE (synced_at IS NULL OR synced_at = '')
+      AND (spam IS NULL OR spam = 0);
+"""
+
 
 def get_connection(db_path: Path) -> sqlite3.Connection:
     """
@@ -42,14 +63,16 @@ def get_connection(db_path: Path) -> sqlite3.Connection:
     if key in conns:
         conn = conns[key]
         try:
-            # quick liveness check (will raise if closed/corrupt)
-            conn.execute("SELECT 1;")
+            # liveness check without running SQL: raises ProgrammingError once the connection is closed
+            conn.total_changes
             return conn
         except (sqlite3.ProgrammingError, sqlite3.OperationalError, sqlite3.DatabaseError):
             try:
                 conn.close()
             except Exception:
                 pass
+            with _open_conns_lock:
+                _open_conns.discard(conn)
             del conns[key]
 
     # ensure parent dir exists
@@ -67,12 +90,38 @@ def get_connection(db_path: Path) -> sqlite3.Connection:
         conn.execute("PRAGMA synchronous=NORMAL;")
         conn.execute("PRAGMA foreign_keys=ON;")
         conn.execute("PRAGMA busy_timeout=5000;")
+        # keep sort/temp b-trees off disk and give each connection a 64 MiB page cache
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB};")
     except Exception:
         pass
     conns[key] = conn
+    with _open_conns_lock:
+        _open_conns.add(conn)
     return conn
 
 
+def close_all_connections() -> None:
+    """
+    Close every connection opened by get_connection, in any thread.
+
+    Closing the last connection checkpoints the WAL and removes the -wal/-shm
+    sidecar files. Threads holding a closed connection transparently reopen on
+    their next get_connection call. Registered to run at interpreter exit.
+    """
+    with _open_conns_lock:
+        conns = list(_open_conns)
+        _open_conns.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+atexit.register(close_all_connections)
+
+
 def ensure_schema(db_path: Path) -> None:
     """
     Ensure the SQLite schema exists and is up-to-date.
@@ -146,6 +195,19 @@ def ensure_schema(db_path: Path) -> None:
     cur.execute("CREATE INDEX IF NOT EXISTS idx_processed_synced_at ON processed(synced_at);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_processed_archived_at ON processed(archived_at);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_processed_date_header ON processed(date_header);")
+
+    # Fingerprints of local mail files, reused while a file's size and mtime are unchanged
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS file_hashes
+        (
+            path     TEXT PRIMARY KEY,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            hash     TEXT    NOT NULL
+        );
+        """
+    )
     conn.commit()
 
 
@@ -157,14 +219,7 @@ def fetch_unsynced(db_path: Path) -> List[sqlite3.Row]:
     """
     conn = get_connection(db_path)
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT *
-        FROM processed
-        WHERE (synced_at IS NULL OR synced_at = '')
-          AND (spam IS NULL OR spam = 0);
-        """
-    )
+    cur.execute(FETCH_UNSYNCED_SQL)
     return cur.fetchall()
 
 
@@ -192,11 +247,28 @@ def mark_synced(db_path: Path, hash_val: Optional[str], hash_sha256: Optional[st
     conn.commit()
 
 
-def fetch_synced(db_path: Path) -> List[sqlite3.Row]:
+def count_synced(db_path: Path) -> int:
+    """Return the number of rows fetch_synced() will yield, for progress reporting."""
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT COUNT(*)
+        FROM processed
+        WHERE synced_at IS NOT NULL
+          AND synced_at <> '';
+        """
+    )
+    return cur.fetchone()[0]
+
+
+def fetch_synced(db_path: Path) -> Iterator[sqlite3.Row]:
     """
-    Return rows that have been marked as synced (synced_at not null).
+    Yield rows that have been marked as synced (synced_at not null).
 
     Used by integrity checks to compare local metadata vs remote content.
+    Rows are streamed from the cursor in fetchmany() chunks so large archives
+    are never fully materialized in memory.
     """
     conn = get_connection(db_path)
     cur = conn.cursor()
@@ -208,7 +280,8 @@ def fetch_synced(db_path: Path) -> List[sqlite3.Row]:
           AND synced_at <> '';
         """
     )
-    return cur.fetchall()
+    while rows := cur.fetchmany(FETCH_CHUNK_SIZE):
+        yield from rows
 
 
 def mark_archived_year(db_path: Path, year: int) -> None:
@@ -216,19 +289,24 @@ def mark_archived_year(db_path: Path, year: int) -> None:
     Mark all synced items that belong to the given `year` as archived (set archived_at).
 
     Uses the email's date_header to determine the year. Only affects rows that
-    are synced and not yet archived.
+    are synced and not yet archived. date_header holds the UTC ISO timestamp
+    written by the extractor, so its leading digits are the UTC year and a plain
+    range comparison selects the year in one set-based UPDATE.
     """
     conn = get_connection(db_path)
     cur = conn.cursor()
-    cur.execute("SELECT hash, date_header FROM processed WHERE synced_at IS NOT NULL AND archived_at IS NULL;")
-    rows = cur.fetchall()
-    to_update = []
-    for r in rows:
-        y, _ = parse_year_and_ts(r["date_header"])
-        if y == year:
-            to_update.append(r["hash"])
-    for h in to_update:
-        cur.execute("UPDATE processed SET archived_at = datetime('now') WHERE hash = ?;", (h,))
+    cur.execute(
+        """
+        UPDATE processed
+        SET archived_at = datetime('now')
+        WHERE synced_at IS NOT NULL
+          AND archived_at IS NULL
+          AND date_header >= ?
+          AND date_header < ?;
+        """,
+        # trailing "-" keeps the bounds text; bare "2023" would get NUMERIC affinity from the DATETIME column
+        (f"{year}-", f"{year + 1}-"),
+    )
     conn.commit()
 
 
@@ -247,6 +325,16 @@ def is_processed(db_path: Path, fingerprint: str) -> bool:
     return cur.fetchone() is not None
 
 
+def fetch_processed_hashes(db_path: Path) -> set[str]:
+    """
+    Return the set of all message fingerprints in the processed table.
+    """
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.execute("SELECT hash FROM processed;")
+    return {r[0] for r in cur}
+
+
 def mark_processed(
         db_path: Path,
         fingerprint: str,
@@ -261,14 +349,32 @@ def mark_processed(
     Insert or update a processed message record.
     Uses an upsert keyed by the message fingerprint and commits.
     """
+    mark_processed_many(db_path, [(fingerprint, path, from_hdr, subj, date_hdr, attachments, spam)])
+
+
+ProcessedRecord = Tuple[str, str, str, str, str, List[str], bool]
+
+
+def mark_processed_many(db_path: Path, records: Iterable[ProcessedRecord]) -> None:
+    """
+    Upsert many processed message records in a single transaction.
+
+    `records` yields (fingerprint, path, from_hdr, subj, date_hdr, attachments, spam)
+    tuples as taken by mark_processed(); records without a fingerprint are skipped.
+    """
     _logger = get_logger(__name__)
-    if not fingerprint:
-        _logger.warning("mark_processed called without fingerprint; skipping")
+    params = []
+    for fingerprint, path, from_hdr, subj, date_hdr, attachments, spam in records:
+        if not fingerprint:
+            _logger.warning("mark_processed called without fingerprint; skipping")
+            continue
+        params.append((fingerprint, path, from_hdr, subj, date_hdr, json.dumps(attachments), int(spam)))
+    if not params:
         return
 
     conn = get_connection(db_path)
     cur = conn.cursor()
-    cur.execute(
+    cur.executemany(
         """
         INSERT INTO processed
         (hash, path, from_header, subject, date_header, attachments, spam, processed_at)
@@ -282,19 +388,71 @@ def mark_processed(
             spam=excluded.spam,
             processed_at= CURRENT_TIMESTAMP;
         """,
-        (
-            fingerprint,
-            path,
-            from_hdr,
-            subj,
-            date_hdr,
-            json.dumps(attachments),
-            int(spam),
-        ),
+        params,
     )
     conn.commit()
 
 
+FileHashRecord = Tuple[str, int, int, str]
+
+
+def lookup_file_hash(db_path: Path, path: str, size: int, mtime_ns: int) -> Optional[str]:
+    """
+    Return the cached fingerprint of the file at `path`, or None.
+
+    A cached hash only counts while the file's size and mtime (in ns) still match
+    the values it was stored with.
+    """
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?;",
+        (path, size, mtime_ns),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def store_file_hashes(db_path: Path, records: Iterable[FileHashRecord]) -> None:
+    """
+    Upsert many (path, size, mtime_ns, hash) file fingerprints in a single transaction.
+    """
+    params = list(records)
+    if not params:
+        return
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO file_hashes (path, size, mtime_ns, hash)
+        VALUES (?, ?, ?, ?) ON CONFLICT(path) DO
+        UPDATE SET
+            size=excluded.size,
+            mtime_ns=excluded.mtime_ns,
+            hash=excluded.hash;
+        """,
+        params,
+    )
+    conn.commit()
+
+
+def prune_file_hashes(db_path: Path, keep_paths: Iterable[str]) -> int:
+    """
+    Delete cached fingerprints for paths not in `keep_paths` (e.g. files renamed on flag changes).
+
+    Returns the number of deleted entries.
+    """
+    keep = set(keep_paths)
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.execute("SELECT path FROM file_hashes;")
+    stale = [(path,) for (path,) in cur.fetchall() if path not in keep]
+    if stale:
+        cur.executemany("DELETE FROM file_hashes WHERE path = ?;", stale)
+        conn.commit()
+    return len(stale)
+
+
 def get_candidate_rotation_years(db_path: Path, target_year: int) -> List[int]:
     """
     Return list of years (ints) that are <= target_year and have synced emails.
@@ -357,3 +515,125 @@ def update_remote_path(db_path: Path, hash_val: str, remote_path: str) -> None:
         (remote_path, hash_val),
     )
     conn.commit()
+
+
+def update_remote_paths(db_path: Path, updates: Iterable[Tuple[str, str]]) -> None:
+    """
+    Update remote_path for many processed rows in a single transaction.
+
+    `updates` yields (hash, remote_path) pairs; pairs without a hash are skipped.
+    """
+    params = [(remote_path, hash_val) for hash_val, remote_path in updates if hash_val]
+    if not params:
+        return
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        UPDATE processed
+        SET remote_path = ?
+        WHERE hash = ?;
+        """,
+        params,
+    )
+    conn.commit()
+
+
+class _WriteBatch:
+    """
+    Buffer rows and write them in batches via flush_fn(db_path, rows).
+
+    Thread-safe. Pending rows are flushed once `batch_size` is reached and
+    when the context manager exits (also on error, so completed work is recorded).
+    """
+
+    def __init__(self, db_path: Path, flush_fn: Callable[[Path, list], None], batch_size: int):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._flush_fn = flush_fn
+        self._pending: list = []
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        return False
+
+    def _add(self, row: tuple) -> None:
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write all pending rows."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._flush_fn(self.db_path, pending)
+
+
+class RemotePathBatch(_WriteBatch):
+    """Batch remote_path updates for update_remote_paths()."""
+
+    def __init__(self, db_path: Path, batch_size: int = 2000):
+        super().__init__(db_path, update_remote_paths, batch_size)
+
+    def add(self, hash_val: Optional[str], remote_path: str) -> None:
+        """Queue a remote_path update, flushing if the batch is full."""
+        if hash_val:
+            self._add((hash_val, remote_path))
+
+
+class ProcessedBatch(_WriteBatch):
+    """
+    Batch processed-message upserts for mark_processed_many().
+
+    `fingerprint in batch` replaces is_processed(): on first use it loads every
+    fingerprint already in the DB into memory, and it also covers records that
+    are not yet written, so duplicate detection costs no query per message.
+    """
+
+    def __init__(self, db_path: Path, batch_size: int = 500):
+        super().__init__(db_path, mark_processed_many, batch_size)
+        self._known: Optional[set[str]] = None
+
+    def __contains__(self, fingerprint: str) -> bool:
+        with self._lock:
+            if self._known is None:
+                self._known = fetch_processed_hashes(self.db_path)
+                self._known.update(r[0] for r in self._pending)
+            return fingerprint in self._known
+
+    def add(
+            self,
+            fingerprint: str,
+            path: str,
+            from_hdr: str,
+            subj: str,
+            date_hdr: str,
+            attachments: list[str],
+            spam: bool,
+    ) -> None:
+        """Queue a processed record (same arguments as mark_processed), flushing if the batch is full."""
+        with self._lock:
+            if self._known is not None:
+                self._known.add(fingerprint)
+            self._add((fingerprint, path, from_hdr, subj, date_hdr, attachments, spam))
+
+
+class FileHashBatch(_WriteBatch):
+    """Batch file fingerprint upserts for store_file_hashes()."""
+
+    def __init__(self, db_path: Path, batch_size: int = 2000):
+        super().__init__(db_path, store_file_hashes, batch_size)
+
+    def add(self, path: str, size: int, mtime_ns: int, hash_val: str) -> None:
+        """Queue a file fingerprint, flushing if the batch is full."""
+        self._add((path, size, mtime_ns, hash_val))
@@ -33,16 +33,14 @@ class TaskResult(Generic[T]):
 
 
 class InterruptFlag:
-    """Thread-safe interrupt flag for signaling shutdown."""
+    """Thread-safe interrupt flag for signaling shutdown (threading.Event needs no extra lock)."""
 
     def __init__(self):
         self._interrupted = threading.Event()
-        self._lock = threading.RLock()
 
     def set(self):
         """Signal that an interrupt has occurred."""
-        with self._lock:
-            self._interrupted.set()
+        self._interrupted.set()
 
     def is_set(self) -> bool:
         """Check if interrupt has been signaled."""
@@ -50,36 +48,20 @@ class InterruptFlag:
 
     def clear(self):
         """Clear the interrupt flag."""
-        with self._lock:
-            self._interrupted.clear()
+        self._interrupted.clear()
 
 
-class GlobalInterruptManager:
-    """
-    Global interrupt manager to coordinate shutdown across all executors.
-    
-    This singleton provides a centralized way to handle interrupts and
-    signal all active executors to shut down gracefully.
+class InterruptManager:
     """
+    Interrupt manager that coordinates shutdown across a set of executors.
 
-    _instance: Optional[GlobalInterruptManager] = None
-    _lock = threading.RLock()
-
-    def __new__(cls):
-        """Ensure only one instance exists (singleton pattern)."""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    Production code uses the process-wide GlobalInterruptManager; separate
+    instances can be injected into executors to keep their interrupt state
+    isolated (e.g. in tests).
+    """
 
     def __init__(self):
-        """Initialize the global interrupt manager."""
-        if self._initialized:
-            return
-
-        self._initialized = True
+        """Initialize the interrupt manager."""
         self._global_flag = InterruptFlag()
         self._executors: list[ManagedThreadPoolExecutor] = []
         self._executors_lock = threading.RLock()
@@ -127,6 +109,35 @@ class GlobalInterruptManager:
             self._executors.clear()
 
 
+class GlobalInterruptManager(InterruptManager):
+    """
+    Global interrupt manager to coordinate shutdown across all executors.
+    
+    This singleton provides a centralized way to handle interrupts and
+    signal all active executors to shut down gracefully.
+    """
+
+    _instance: Optional[GlobalInterruptManager] = None
+    _lock = threading.RLock()
+
+    def __new__(cls):
+        """Ensure only one instance exists (singleton pattern)."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the global interrupt manager."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        super().__init__()
+
+
 # Global instance
 _global_interrupt_manager = GlobalInterruptManager()
 
@@ -150,6 +161,7 @@ class ManagedThreadPoolExecutor:
             name: str = "Worker",
             progress_interval: int = 25,
             silent: bool = False,
+            manager: Optional[InterruptManager] = None,
     ):
         """
         Initialize managed thread pool executor.
@@ -158,6 +170,7 @@ class ManagedThreadPoolExecutor:
             max_workers: Maximum number of worker threads
             name: Name for logging and identification
             progress_interval: Log progress every N completed tasks
+            manager: Interrupt manager to register with (defaults to the global one)
         """
         self.logger = get_logger(__name__)
         self.max_workers = max(1, max_workers)
@@ -171,6 +184,7 @@ class ManagedThreadPoolExecutor:
         self._total = 0
         self._lock = threading.RLock()
         self._registered = False
+        self._manager: InterruptManager = manager if manager is not None else _global_interrupt_manager
 
     def __enter__(self):
         """Context manager entry."""
@@ -178,17 +192,28 @@ class ManagedThreadPoolExecutor:
             max_workers=self.max_workers,
             thread_name_prefix=self.name
         )
-        # Register with global interrupt manager
-        _global_interrupt_manager.register_executor(self)
+        # Register with the (global) interrupt manager
+        self._manager.register_executor(self)
         self._registered = True
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit with graceful shutdown."""
+        """
+        Context manager exit with graceful shutdown.
+
+        On a clean exit all submitted tasks are drained. If the block raised or an
+        interrupt was signaled, queued tasks that have not started are cancelled
+        so shutdown only waits for the ones already running.
+        """
         if self._registered:
-            _global_interrupt_manager.unregister_executor(self)
+            self._manager.unregister_executor(self)
             self._registered = False
-        self.shutdown(wait=True)
+        interrupted = (
+                exc_type is not None
+                or self.interrupt_flag.is_set()
+                or self._manager.is_interrupted()
+        )
+        self.shutdown(wait=True, cancel_futures=interrupted)
         return False  # Don't suppress exceptions
 
     def _completion_callback(self, future):
@@ -214,12 +239,12 @@ class ManagedThreadPoolExecutor:
         if self._executor is None:
             raise RuntimeError("Executor not started. Use context manager.")
 
-        if self.interrupt_flag.is_set() or _global_interrupt_manager.is_interrupted():
+        if self.interrupt_flag.is_set() or self._manager.is_interrupted():
             raise InterruptedError("Executor has been interrupted")
 
         # Wrap the function to check interrupt flag
         def wrapped():
-            if self.interrupt_flag.is_set() or _global_interrupt_manager.is_interrupted():
+            if self.interrupt_flag.is_set() or self._manager.is_interrupted():
                 raise InterruptedError("Task cancelled due to interrupt")
             try:
                 return fn(item)
@@ -251,40 +276,44 @@ class ManagedThreadPoolExecutor:
             increment_callback: Callable to increment the progress (once a task is completed)
             
         Returns:
-            List of TaskResult objects
+            List of TaskResult objects, in the order of `items` (tasks never
+            submitted because of an interrupt are left out)
         """
         if self._executor is None:
             raise RuntimeError("Executor not started. Use context manager.")
 
-        results: list[TaskResult[R]] = []
         items_list = list(items)
         total = len(items_list)
 
         if total == 0:
-            return results
+            return []
+
+        # Results are collected as tasks complete but stored by submission index
+        results: list[Optional[TaskResult[R]]] = [None] * total
 
         silent_info(self.logger, f"Queuing {total} items with {self.max_workers} workers for {self.name}", self.silent)
 
         # Submit all tasks
-        futures_map: dict[Future[R], T] = {}
-        for item in items_list:
-            if self.interrupt_flag.is_set() or _global_interrupt_manager.is_interrupted():
+        futures_map: dict[Future[R], int] = {}
+        for index, item in enumerate(items_list):
+            if self.interrupt_flag.is_set() or self._manager.is_interrupted():
                 self.logger.warning(f"{self.name} interrupted before all tasks submitted")
                 break
 
             future = self.submit(fn, item)
-            futures_map[future] = item
+            futures_map[future] = index
 
         self.logger.debug(f"Finished preprocessing for {total} items")
 
         # Collect results as they complete
         try:
             for future in as_completed(futures_map.keys()):
-                if self.interrupt_flag.is_set() or _global_interrupt_manager.is_interrupted():
+                if self.interrupt_flag.is_set() or self._manager.is_interrupted():
                     self.logger.warning(f"{self.name} interrupted, stopping result collection")
                     raise KeyboardInterrupt()
 
-                item = futures_map[future]
+                index = futures_map[future]
+                item = items_list[index]
                 try:
                     result = future.result()
                     task_res = TaskResult(
@@ -309,7 +338,7 @@ class ManagedThreadPoolExecutor:
                         item=item
                     )
 
-                results.append(task_res)
+                results[index] = task_res
                 if increment_callback is not None:
                     increment_callback(task_res)
 
@@ -329,9 +358,12 @@ class ManagedThreadPoolExecutor:
         except (KeyboardInterrupt, InterruptedError):
             self.logger.warning(f"{self.name} interrupted")
             self.interrupt_flag.set()
+            # Drop queued tasks right away rather than waiting for shutdown
+            for future in futures_map:
+                future.cancel()
             raise
 
-        return results
+        return [r for r in results if r is not None]
 
     def shutdown(self, wait: bool = True, cancel_futures: bool = True):
         """
@@ -371,6 +403,7 @@ def create_managed_executor(
         name: str = "Worker",
         progress_interval: int = 25,
         silent: bool = False,
+        manager: Optional[InterruptManager] = None,
 ) -> ManagedThreadPoolExecutor:
     """
     Factory function to create a managed thread pool executor.
@@ -379,6 +412,7 @@ def create_managed_executor(
         max_workers: Maximum number of worker threads
         name: Name for logging and identification
         progress_interval: Log progress every N completed tasks
+        manager: Interrupt manager to register with (defaults to the global one)
         
     Returns:
         ManagedThreadPoolExecutor instance
@@ -388,6 +422,7 @@ def create_managed_executor(
         name=name,
         progress_interval=progress_interval,
         silent=silent,
+        manager=manager,
     )
 
 
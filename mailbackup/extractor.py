@@ -13,10 +13,18 @@ Preserves spam detection, Windows-safe filenames, periodic status logging.
 
 from __future__ import annotations
 
+import binascii
 import email
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
 from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser, BytesParser
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import BinaryIO, Iterable, Iterator
 
 from mailbackup import db
 from mailbackup.config import Settings
@@ -24,9 +32,19 @@ from mailbackup.executor import create_managed_executor
 from mailbackup.logger import get_logger
 from mailbackup.statistics import ThreadSafeStats, create_increment_callback, StatKey
 from mailbackup.utils import (
-    sanitize, unique_path_for_filename, sha256_bytes, parse_mail_date, parse_year_and_ts
+    sanitize, unique_path_for_filename, sha256_fileobj, parse_mail_date, parse_year_and_ts
 )
 
+try:
+    import fast_mail_parser  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    fast_mail_parser = None
+
+# Parsers keep no per-message state (each parse builds its own FeedParser), so one
+# instance is shared by all threads instead of being constructed per message.
+_HEADER_PARSER = BytesHeaderParser()
+_BODY_PARSER = BytesParser()
+
 
 # ----------------------------------------------------------------------
 # MIME decoding helpers
@@ -35,9 +53,12 @@ from mailbackup.utils import (
 
 def decode_mime_header(raw_header) -> str:
     """Decode MIME-encoded email headers safely and return plain string."""
-    logger = get_logger(__name__)
     if not raw_header:
         return ""
+    if isinstance(raw_header, str) and raw_header.isascii() and "=?" not in raw_header:
+        # No encoded words: decode_header/make_header would hand the string back unchanged
+        return raw_header
+    logger = get_logger(__name__)
     try:
         decoded = make_header(decode_header(raw_header))
         if not isinstance(decoded, str):
@@ -51,6 +72,24 @@ def decode_mime_header(raw_header) -> str:
         return str(raw_header)
 
 
+@lru_cache(maxsize=64)
+def _usable_charset(charset: str) -> str:
+    """
+    Return charset if Python has a codec for it, else "utf-8".
+
+    Cached so an unknown label (or a non-text codec like "base64") costs one
+    failed lookup per process instead of a raised and caught LookupError for
+    every part. The label itself (not the CodecInfo) is returned so bytes.decode
+    keeps its C fast path for common names like utf-8.
+    """
+    try:
+        # Decode one byte: empty input returns "" without consulting the codec at all
+        b"a".decode(charset, errors="replace")
+    except LookupError:
+        return "utf-8"
+    return charset
+
+
 def decode_text_part(part) -> str:
     """Decode a text/plain or text/html part into UTF-8."""
     logger = get_logger(__name__)
@@ -58,11 +97,8 @@ def decode_text_part(part) -> str:
         payload = part.get_payload(decode=True)
         if payload is None:
             return ""
-        charset = part.get_content_charset() or "utf-8"
-        try:
-            return payload.decode(charset, errors="replace")
-        except LookupError:
-            return payload.decode("utf-8", errors="replace")
+        charset = _usable_charset(part.get_content_charset() or "utf-8")
+        return payload.decode(charset, errors="replace")
     except (KeyboardInterrupt, InterruptedError):
         logger.error("Interrupted while decoding email")
         raise
@@ -81,14 +117,97 @@ def save_attachment(part, outdir: Path) -> str | None:
     Save an attachment part into outdir.
     Returns the path as string, or None if saving failed.
     """
-    fn = part.get_filename() or "attachment"
-    fn = decode_mime_header(fn)
-    fn = sanitize(fn)
+    fn = decode_mime_header(part.get_filename() or "attachment")
+    if str(part.get("Content-Transfer-Encoding", "")).strip().lower() == "base64":
+        encoded = part.get_payload()
+        if isinstance(encoded, str) and encoded.strip():
+            try:
+                return write_base64_attachment(fn, encoded, outdir)
+            except ValueError as e:
+                # Let the stdlib decoder below deal with (and repair) it
+                get_logger(__name__).debug(f"Chunked base64 decode failed for {fn}: {e}")
+    return write_attachment(fn, part.get_payload(decode=True), outdir)
+
+
+# Characters of base64 decoded per write (~48 KiB of output), extended to the next line end
+_BASE64_CHUNK_CHARS = 64 * 1024
+
+
+def _iter_base64_chunks(encoded: str) -> Iterator[bytes]:
+    """Decode encoded in line-aligned slices of about _BASE64_CHUNK_CHARS characters."""
+    pos = 0
+    while pos < len(encoded):
+        end = encoded.find("\n", pos + _BASE64_CHUNK_CHARS)
+        end = len(encoded) if end == -1 else end + 1
+        yield binascii.a2b_base64(encoded[pos:end])
+        pos = end
+
+
+def _matches_file(path: Path, chunks: Iterable[bytes]) -> bool:
+    """
+    Return True if path is a file whose content equals the concatenated chunks.
+
+    Stops reading (and decoding) at the first differing chunk.
+    """
+    try:
+        with open(path, "rb") as f:
+            for chunk in chunks:
+                if f.read(len(chunk)) != chunk:
+                    return False
+            return not f.read(1)
+    except OSError:
+        return False
+
+
+def write_base64_attachment(fn: str, encoded: str, outdir: Path) -> str | None:
+    """
+    Decode a base64 attachment body into outdir in line-aligned chunks.
+
+    Unlike get_payload(decode=True) this never holds the whole decoded file in
+    memory. If outdir already holds a byte-identical file of that name (e.g.
+    the message is re-extracted), its path is returned and nothing is written.
+    Returns the path as string, or None if writing failed. Raises
+    ValueError (leaving no file behind) if the body cannot be decoded chunk
+    by chunk, e.g. odd line lengths or 8-bit junk.
+    """
+    logger = get_logger(__name__)
+    fn = sanitize(fn or "attachment")
+    existing = outdir / fn
+    if existing.is_file() and _matches_file(existing, _iter_base64_chunks(encoded)):
+        return str(existing)
+    out = unique_path_for_filename(outdir, fn)
+    try:
+        with open(out, "wb") as f:
+            for chunk in _iter_base64_chunks(encoded):
+                f.write(chunk)
+        return str(out)
+    except (KeyboardInterrupt, InterruptedError):
+        logger.error("Interrupted while writing attachment")
+        out.unlink(missing_ok=True)
+        raise
+    except ValueError:
+        out.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to save attachment {fn}: {e}")
+        return None
+
+
+def write_attachment(fn: str, payload: bytes | None, outdir: Path) -> str | None:
+    """
+    Write already decoded attachment bytes named fn into outdir.
+    A byte-identical file of that name already in outdir is reused.
+    Returns the path as string, or None if nothing was written.
+    """
+    fn = sanitize(fn or "attachment")
+    existing = outdir / fn
+    if payload and existing.is_file() and existing.stat().st_size == len(payload) \
+            and _matches_file(existing, (payload,)):
+        return str(existing)
     out = unique_path_for_filename(outdir, fn)
 
     # prefer central logger
     logger = get_logger(__name__)
-    payload = part.get_payload(decode=True)
     if payload:
         try:
             out.write_bytes(payload)
@@ -106,65 +225,149 @@ def save_attachment(part, outdir: Path) -> str | None:
 # ----------------------------------------------------------------------
 
 
+def parse_fast(raw: bytes):
+    """
+    Parse raw with fast_mail_parser when it is installed and return its mail object.
+
+    Returns None when the parser is unavailable, rejects the message or had
+    to repair it (e.g. an unknown charset label), so the caller falls back to
+    the stdlib parser.
+    """
+    if fast_mail_parser is None:
+        return None
+    try:
+        mail = fast_mail_parser.parse_email(raw)
+    except (KeyboardInterrupt, InterruptedError):
+        raise
+    except Exception as e:
+        get_logger(__name__).debug(f"fast_mail_parser rejected message, using stdlib parser: {e}")
+        return None
+    if mail.warnings:
+        return None
+    return mail
+
+
+def write_body(outdir: Path, ctype: str, text: str) -> str | None:
+    """Write a decoded text/plain or text/html body into outdir, skipping blank bodies."""
+    if not text.strip():
+        return None
+    ext = ".html" if "html" in ctype else ".txt"
+    outpath = unique_path_for_filename(outdir, "body" + ext)
+    outpath.write_text(text, encoding="utf-8", errors="replace")
+    return str(outpath)
+
+
+_SPAM_SUBJECT_MARKERS = ("[spam]", "***spam***", "junk", "phish")
+_SPAM_FOLDERS = ("/spam/", "/junk/", "/trash/")
+
+
+def _is_spam_subject(subject_lower: str) -> bool:
+    return any(marker in subject_lower for marker in _SPAM_SUBJECT_MARKERS)
+
+
+def _is_spam_folder(path_lower: str) -> bool:
+    return any(folder in path_lower for folder in _SPAM_FOLDERS)
+
+
 def detect_spam(msg, subj: str, eml_path: Path) -> bool:
     """Simple spam detection heuristic."""
     subject_lower = subj.lower()
+    if _is_spam_subject(subject_lower):
+        return True
+
     # normalisiere Pfadtrenner für plattformunabhängige Prüfung
     path_lower = str(eml_path).lower().replace("\\", "/")
-    spam_flag = msg.get("X-Spam-Flag", "").lower()
-    spam_status = msg.get("X-Spam-Status", "").lower()
-
-    if any(word in subject_lower for word in ("[spam]", "***spam***", "junk", "phish")):
-        return True
-    elif any(folder in path_lower for folder in ("/spam/", "/junk/", "/trash/")):
+    if _is_spam_folder(path_lower):
         return True
-    elif "yes" in spam_flag or spam_status.startswith("yes"):
+
+    if "yes" in msg.get("X-Spam-Flag", "").lower():
         return True
-    return False
+    return msg.get("X-Spam-Status", "").lower().startswith("yes")
+
 
+@dataclass
+class ExtractedMessage:
+    """Metadata and saved file paths for one parsed email, ready for the DB."""
+    from_header: str
+    subject: str
+    date_iso: str
+    saved_paths: list[str]
+    spam: bool
 
-def process_email_file(eml: Path, attachments_root: Path, db_path: Path, stats: ThreadSafeStats) -> bool:
+
+def read_header_block(f: BinaryIO) -> bytes:
+    """Read the header block of a message from f, stopping at the blank line before the body."""
+    lines = []
+    for line in f:
+        lines.append(line)
+        if line in (b"\n", b"\r\n"):
+            break
+    return b"".join(lines)
+
+
+def extract_message(eml: Path, attachments_root: Path, f: BinaryIO | None = None) -> ExtractedMessage | None:
     """
-    Process one email file.
-    Returns True if processed, False if failed.
+    Parse the email at eml and write bodies and attachments under attachments_root.
+
+    The headers are parsed on their own first. Spam is decided from them and the
+    path alone, so for spam the body is never read or MIME-parsed. When f is an
+    already open handle on eml, positioned at the start, it is used instead of
+    opening the file again.
+
+    Does not touch the database, so it can run in a worker process.
+    Returns None if the message cannot be read or parsed.
     """
     logger = get_logger(__name__)
-    try:
-        raw = eml.read_bytes()
-    except (KeyboardInterrupt, InterruptedError):
-        logger.error("Interrupted while reading email")
-        raise
-    except Exception as e:
-        logger.error(f"Failed to read {eml}: {e}")
-        return False
+    with ExitStack() as stack:
+        try:
+            if f is None:
+                f = stack.enter_context(open(eml, "rb"))
+            headers = _HEADER_PARSER.parsebytes(read_header_block(f))
+        except (KeyboardInterrupt, InterruptedError):
+            logger.error("Interrupted while parsing email.")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to parse email {eml}: {e}")
+            return None
+        return _extract_with_headers(f, eml, headers, attachments_root)
 
-    # Compute fingerprint
-    fingerprint = sha256_bytes(raw)
 
-    if db.is_processed(db_path, fingerprint):
-        return True
+def _extract_with_headers(f: BinaryIO, eml: Path, headers, attachments_root: Path) -> ExtractedMessage | None:
+    """
+    Finish extract_message once the headers of eml are parsed.
+
+    f is the still open message file; its body is only read when the message is not spam.
+    """
+    logger = get_logger(__name__)
+
+    from_hdr = decode_mime_header(headers.get("From", "unknown"))
+    subj = decode_mime_header(headers.get("Subject", ""))
+    raw_date = headers.get("Date", "")
+    dt = parse_mail_date(raw_date)
+    date_iso = dt.isoformat()
 
+    # Spam detection
+    if detect_spam(headers, subj, eml):
+        return ExtractedMessage(from_hdr, subj, date_iso, [], True)
+
+    mail = msg = None
     try:
-        msg = email.message_from_bytes(raw)
+        # Reuse the handle the headers were read from rather than opening the file again
+        f.seek(0)
+        if fast_mail_parser is not None:
+            raw = f.read()
+            mail = parse_fast(raw)
+            if mail is None:
+                msg = email.message_from_bytes(raw)
+        else:
+            # Let the feed parser consume the file in chunks instead of holding the raw bytes as well
+            msg = _BODY_PARSER.parse(f)
     except (KeyboardInterrupt, InterruptedError):
         logger.error("Interrupted while parsing email.")
         raise
     except Exception as e:
         logger.error(f"Failed to parse email {eml}: {e}")
-        return False
-
-    from_hdr = decode_mime_header(msg.get("From", "unknown"))
-    raw_date = msg.get("Date", "")
-    dt = parse_mail_date(raw_date)
-    date_iso = dt.isoformat()
-    subj = decode_mime_header(msg.get("Subject", ""))
-
-    # Spam detection
-    if detect_spam(msg, subj, eml):
-        db.mark_processed(db_path, fingerprint, str(eml), from_hdr, subj, date_iso, [], True)
-        logger.info(f"Skipped spam: {eml}")
-        stats.increment(StatKey.SKIPPED)
-        return True
+        return None
 
     safe_from = sanitize(from_hdr)
     safe_subj = sanitize(subj) or "no_subject"
@@ -174,29 +377,113 @@ def process_email_file(eml: Path, attachments_root: Path, db_path: Path, stats:
 
     saved_paths: list[str] = []
 
-    for part in msg.walk():
-        ctype = part.get_content_type()
-        disp = part.get("Content-Disposition")
-        disp = disp if isinstance(disp, str) else str(disp or "")
+    if mail is not None:
+        for ctype, texts in (("text/plain", mail.text_plain), ("text/html", mail.text_html)):
+            for text in texts:
+                p = write_body(outdir, ctype, text)
+                if p:
+                    saved_paths.append(p)
+        for att in mail.attachments:
+            if (att.disposition or "").lower() != "attachment":
+                continue
+            p = write_attachment(att.filename, att.content, outdir)
+            if p:
+                saved_paths.append(p)
+    else:
+        for part in msg.walk():
+            ctype = part.get_content_type()
+            disp = part.get("Content-Disposition")
+            disp = disp if isinstance(disp, str) else str(disp or "")
 
-        if part.get_content_maintype() == "multipart":
-            continue
+            if part.get_content_maintype() == "multipart":
+                continue
 
-        if "attachment" in disp.lower():
-            p = save_attachment(part, outdir)
+            if "attachment" in disp.lower():
+                p = save_attachment(part, outdir)
+            elif ctype in ("text/plain", "text/html"):
+                p = write_body(outdir, ctype, decode_text_part(part))
+            else:
+                continue
             if p:
                 saved_paths.append(p)
-        elif ctype in ("text/plain", "text/html"):
-            decoded_text = decode_text_part(part)
-            if decoded_text.strip():
-                ext = ".html" if "html" in ctype else ".txt"
-                fname = "body" + ext
-                outpath = unique_path_for_filename(outdir, fname)
-                outpath.write_text(decoded_text, encoding="utf-8", errors="replace")
-                saved_paths.append(str(outpath))
-
-    db.mark_processed(db_path, fingerprint, str(eml), from_hdr, subj, date_iso, saved_paths, False)
-    stats.increment(StatKey.EXTRACTED)
+
+    return ExtractedMessage(from_hdr, subj, date_iso, saved_paths, False)
+
+
+def process_email_file(
+        eml: Path,
+        attachments_root: Path,
+        db_path: Path,
+        stats: ThreadSafeStats,
+        parser_pool: Executor | None = None,
+        batch: db.ProcessedBatch | None = None,
+        hashes: db.FileHashBatch | None = None,
+) -> bool:
+    """
+    Process one email file.
+
+    Parsing and file extraction run in parser_pool when one is given (e.g. a
+    ProcessPoolExecutor, to get around the GIL); hashing, the duplicate check
+    and the DB write always happen in the calling thread. With a batch the
+    DB record is buffered there instead of being committed immediately, and
+    duplicates are looked up in its in-memory fingerprint set, not the DB.
+
+    The fingerprint is taken from the file hash cache while the file's size and
+    mtime are unchanged, so already processed files are not read at all. New
+    fingerprints are queued on hashes when given, stored immediately otherwise.
+    Returns True if processed, False if failed.
+    """
+    logger = get_logger(__name__)
+    with ExitStack() as stack:
+        f = None
+        try:
+            st = os.stat(eml)
+            fingerprint = db.lookup_file_hash(db_path, str(eml), st.st_size, st.st_mtime_ns)
+            if fingerprint is None:
+                # Compute fingerprint, streaming the file rather than reading it into memory
+                f = stack.enter_context(open(eml, "rb"))
+                fingerprint = sha256_fileobj(f)
+                if hashes is not None:
+                    hashes.add(str(eml), st.st_size, st.st_mtime_ns, fingerprint)
+                else:
+                    db.store_file_hashes(db_path, [(str(eml), st.st_size, st.st_mtime_ns, fingerprint)])
+        except (KeyboardInterrupt, InterruptedError):
+            logger.error("Interrupted while reading email")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to read {eml}: {e}")
+            return False
+
+        if batch is not None:
+            duplicate = fingerprint in batch
+        else:
+            duplicate = db.is_processed(db_path, fingerprint)
+        if duplicate:
+            return True
+
+        if parser_pool is not None:
+            stack.close()
+            extracted = parser_pool.submit(extract_message, eml, attachments_root).result()
+        elif f is not None:
+            # Parse from the handle that was just hashed rather than opening the file again
+            f.seek(0)
+            extracted = extract_message(eml, attachments_root, f)
+        else:
+            extracted = extract_message(eml, attachments_root)
+    if extracted is None:
+        return False
+
+    record = (fingerprint, str(eml), extracted.from_header, extracted.subject,
+              extracted.date_iso, extracted.saved_paths, extracted.spam)
+    if batch is not None:
+        batch.add(*record)
+    else:
+        db.mark_processed(db_path, *record)
+    if extracted.spam:
+        logger.info(f"Skipped spam: {eml}")
+        stats.increment(StatKey.SKIPPED)
+    else:
+        stats.increment(StatKey.EXTRACTED)
     return True
 
 
@@ -212,30 +499,41 @@ def iter_mail_files(root_maildir: Path) -> Iterator[Path]:
             account2/
                 INBOX/{cur,new,tmp}/
                 ...
-    Only files inside 'cur' and 'new' are yielded.
+    Only files inside 'cur' and 'new' are yielded. Every subdirectory is
+    descended into, so user folders named 'cur', 'new' or 'tmp' (and folders
+    nested below them) are still found; the files of a 'tmp' spool are never
+    yielded.
+
+    Walks the tree with os.scandir so directory checks use the d_type cached
+    on each entry instead of a stat() per path.
     """
+    return map(Path, _iter_message_paths(root_maildir))
+
+
+def _iter_message_paths(root_maildir: Path) -> Iterator[str]:
+    """Yield message paths as the plain strings scandir produces; iter_mail_files wraps them."""
     if not root_maildir.exists():
         return
 
-    for account_dir in root_maildir.iterdir():
-        if not account_dir.is_dir() or account_dir.name.startswith("."):
-            continue
-
-        # Walk recursively through all folders within each account
-        for folder in account_dir.rglob("*"):
-            if not folder.is_dir():
-                continue
-            if folder.name not in ("cur", "new"):
-                continue
+    with os.scandir(root_maildir) as it:
+        accounts = [entry.path for entry in it if entry.is_dir() and not entry.name.startswith(".")]
 
-            for msg in folder.iterdir():
-                if msg.is_file() and not msg.name.startswith("."):
-                    yield msg
+    # Walk recursively through all folders within each account; each directory
+    # is scanned once, yielding its messages if it is a cur/new folder
+    stack = [(path, False) for path in accounts]
+    while stack:
+        folder, holds_messages = stack.pop()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, entry.name in ("cur", "new")))
+                elif holds_messages and not entry.name.startswith(".") and entry.is_file():
+                    yield entry.path
 
 
 def count_mail_files(root_maildir: Path) -> int:
-    """Count all email message files under a multi-account mbsync Maildir."""
-    return sum(1 for _ in iter_mail_files(root_maildir))
+    """Count all email message files under a multi-account mbsync Maildir, without building Path objects."""
+    return sum(1 for _ in _iter_message_paths(root_maildir))
 
 
 def run_extractor(settings: Settings, stats: ThreadSafeStats):
@@ -256,21 +554,42 @@ def run_extractor(settings: Settings, stats: ThreadSafeStats):
     # ensure_db schema uses db.ensure_schema(db_path)
     db.ensure_schema(db_path)
 
-    total_files = count_mail_files(maildir)
+    # Walk the maildir once; the same list serves the total and the work queue
+    mail_files = list(iter_mail_files(maildir))
+    total_files = len(mail_files)
     logger.info(f"Starting extraction. Total email files found: {total_files}")
 
+    parser_pool = None
+    if settings.extract_processes > 0:
+        logger.info(f"Parsing emails in {settings.extract_processes} worker processes")
+        # spawn rather than fork: the parent already runs logging and status threads
+        parser_pool = ProcessPoolExecutor(
+            max_workers=settings.extract_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    batch = db.ProcessedBatch(db_path)
+    hashes = db.FileHashBatch(db_path)
+
     def do_one(eml: Path):
-        return process_email_file(eml, attach_dir, db_path, stats)
+        return process_email_file(eml, attach_dir, db_path, stats, parser_pool, batch, hashes)
 
+    processed_count = 0
     try:
-        with create_managed_executor(
-                max_workers=settings.max_extract_workers,
+        with batch, hashes, create_managed_executor(
+                max_workers=max(settings.max_extract_workers, settings.extract_processes),
                 name="Extractor",
                 progress_interval=1000,
         ) as executor:
-            results = executor.map(do_one, iter_mail_files(maildir), create_increment_callback(stats))
+            results = executor.map(do_one, mail_files, create_increment_callback(stats))
 
             # Count successfully processed emails
             processed_count = sum(1 for r in results if r.success and r.result)
+
+        # Only after a complete walk: drop cached hashes of files that were moved or deleted
+        pruned = db.prune_file_hashes(db_path, map(str, mail_files))
+        logger.debug(f"Pruned {pruned} stale file hash cache entries")
     finally:
+        if parser_pool is not None:
+            parser_pool.shutdown(wait=True, cancel_futures=True)
         logger.info(f"Extraction completed: {processed_count}/{total_files} messages processed.")
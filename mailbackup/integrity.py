@@ -14,11 +14,14 @@ Integrity check and auto-repair:
 from __future__ import annotations
 
 import datetime
+import os
 import shutil
 from pathlib import Path
+from typing import Any, Optional
 
 from mailbackup import db
 from mailbackup.config import Settings
+from mailbackup.executor import TaskResult, create_managed_executor
 from mailbackup.logger import get_logger
 from mailbackup.manifest import ManifestManager, load_manifest_csv
 from mailbackup.rclone import rclone_copyto
@@ -31,6 +34,7 @@ from mailbackup.utils import (
     sanitize,
     load_attachments,
     build_info_json,
+    clone_file,
     sha256,
 )
 
@@ -48,18 +52,22 @@ def rebuild_docset(settings: Settings, year: int, folder: str, row) -> Path:
     ds.mkdir(parents=True, exist_ok=True)
 
     mailpath_p = Path(mailpath)
-    if mailpath_p.exists():
-        shutil.copy2(mailpath_p, ds / "email.eml")
+    mail_exists = mailpath_p.exists()
+    if mail_exists:
+        clone_file(mailpath_p, ds / "email.eml")
 
     attachments = load_attachments(attach_json)
     att_names = []
     for ap in attachments:
-        if ap.exists():
-            sn = sanitize(ap.name)
-            shutil.copy2(ap, ds / sn)
-            att_names.append(sn)
+        sn = sanitize(ap.name)
+        # Missing files are detected by the clone itself rather than a prior stat.
+        try:
+            clone_file(ap, ds / sn)
+        except FileNotFoundError:
+            continue
+        att_names.append(sn)
 
-    if mailpath_p.exists():
+    if mail_exists:
         mail_sha = sha256(mailpath_p)
     else:
         mail_sha = hash_ or ""
@@ -89,7 +97,8 @@ def rebuild_docset(settings: Settings, year: int, folder: str, row) -> Path:
 
 
 def repair_remote(settings: Settings, reason: str, row, manifest: ManifestManager,
-                  stats: ThreadSafeStats) -> None:
+                  stats: ThreadSafeStats, remote_paths: Optional[db.RemotePathBatch] = None,
+                  manifest_entries: Optional[list[tuple[str, str]]] = None) -> None:
     """
     Attempt to repair a missing or mismatched remote document set for a DB row.
 
@@ -97,6 +106,7 @@ def repair_remote(settings: Settings, reason: str, row, manifest: ManifestManage
     - Rebuild a local docset (email.eml + attachments + info.json) from DB and local files
     - Upload files atomically (upload to a temp name then move into place)
     - Update manifest and DB.remote_path if upload succeeded
+      (queued on `remote_paths` / `manifest_entries` when given, written immediately otherwise)
     - Remove temporary build directory
 
     Updates stats['repaired'] on success. Logs extensively; does not raise on upload failure.
@@ -129,12 +139,14 @@ def repair_remote(settings: Settings, reason: str, row, manifest: ManifestManage
         if not atomic_upload_file(ds / "email.eml", f"{remote_base}/email.eml"):
             logger.error("Failed to upload rebuilt email.eml during repair.")
             success = False
-    # attachments
-    for ap in ds.iterdir():
-        if ap.is_file() and ap.name not in ("email.eml", "info.json"):
-            if not atomic_upload_file(ap, f"{remote_base}/{ap.name}"):
-                logger.warning(f"Failed to upload attachment {ap} during repair.")
-                # continue best-effort
+    # attachments (scandir entries carry the file type, no extra stat per file)
+    with os.scandir(ds) as entries:
+        attachment_files = [Path(e.path) for e in entries
+                            if e.is_file() and e.name not in ("email.eml", "info.json")]
+    for ap in attachment_files:
+        if not atomic_upload_file(ap, f"{remote_base}/{ap.name}"):
+            logger.warning(f"Failed to upload attachment {ap} during repair.")
+            # continue best-effort
     # info.json
     if (ds / "info.json").exists():
         if not atomic_upload_file(ds / "info.json", f"{remote_base}/info.json"):
@@ -142,10 +154,17 @@ def repair_remote(settings: Settings, reason: str, row, manifest: ManifestManage
 
     if success:
         # add to manifest and update DB
-        manifest.queue_entry(new_remote_path, hashlocal)
+        if manifest_entries is not None:
+            manifest_entries.append((new_remote_path, hashlocal))
+        else:
+            manifest.queue_entry(new_remote_path, hashlocal)
         # use db helper to update remote_path
-        db.update_remote_path(settings.db_path, hash_, new_remote_path)
-        logger.info(f"Database remote_path updated for {hash_} → {new_remote_path}")
+        if remote_paths is not None:
+            remote_paths.add(hash_, new_remote_path)
+            logger.info(f"Database remote_path update queued for {hash_} → {new_remote_path}")
+        else:
+            db.update_remote_path(settings.db_path, hash_, new_remote_path)
+            logger.info(f"Database remote_path updated for {hash_} → {new_remote_path}")
         stats.increment(StatKey.REPAIRED)
     else:
         logger.error(f"Repair upload failed for {hash_}; DB not updated.")
@@ -154,8 +173,47 @@ def repair_remote(settings: Settings, reason: str, row, manifest: ManifestManage
     shutil.rmtree(ds, ignore_errors=True)
 
 
+def repair_rows(settings: Settings, repairs: list[tuple[str, Any]], manifest: ManifestManager,
+                stats: ThreadSafeStats, remote_paths: Optional[db.RemotePathBatch] = None) -> None:
+    """
+    Repair a batch of (reason, row) pairs in parallel.
+
+    Repairs are network-bound rclone uploads, so they share the upload worker limit.
+    A repair that raises is counted as failed; the remaining repairs continue.
+    Manifest entries for successful repairs are queued in one batch at the end,
+    including when the batch is interrupted.
+    """
+    logger = get_logger(__name__)
+
+    def _repair(item: tuple[str, Any]) -> None:
+        reason, row = item
+        repair_remote(settings, reason, row, manifest, stats, remote_paths, repaired)
+
+    def _on_done(result: TaskResult) -> None:
+        if not result.success:
+            stats.increment(StatKey.FAILED)
+
+    repaired: list[tuple[str, str]] = []
+    max_workers = max(1, int(settings.max_upload_workers))
+    logger.info(f"Repairing {len(repairs)} entries with up to {max_workers} parallel workers...")
+    try:
+        with create_managed_executor(
+                max_workers=max_workers,
+                name="Repairer",
+                progress_interval=25
+        ) as executor:
+            executor.map(_repair, repairs, _on_done)
+            if executor.interrupt_flag.is_set():
+                logger.error("Repair interrupted...")
+                raise KeyboardInterrupt()
+    finally:
+        manifest.queue_entries(repaired)
+
+
 def integrity_check(settings: Settings, manifest: ManifestManager, stats: ThreadSafeStats) -> None:
     logger = get_logger(__name__)
+
+    # Bail out before touching the filesystem, rclone or the DB
     if not settings.verify_integrity:
         logger.info("Integrity verification disabled (verify_integrity=False).")
         return
@@ -188,14 +246,16 @@ def integrity_check(settings: Settings, manifest: ManifestManager, stats: Thread
         return
 
     # Step 4: compare remote vs local DB
-    rows = db.fetch_synced(settings.db_path)
-    total = len(rows)
     missing = 0
     mismatch = 0
+    checked = 0
+    to_repair: list[tuple[str, Any]] = []
 
+    total = db.count_synced(settings.db_path)
     logger.info(f"Starting integrity check for {total} synced messages...")
 
-    for i, row in enumerate(rows, start=1):
+    # Rows are consumed lazily so memory stays flat on large archives
+    for checked, row in enumerate(db.fetch_synced(settings.db_path), start=1):
         dhashlocal = row["hash_sha256"] or ""
         dremotepath = row["remote_path"] or ""
 
@@ -208,13 +268,13 @@ def integrity_check(settings: Settings, manifest: ManifestManager, stats: Thread
                 missing += 1
                 logger.warning(f"Missing on remote: {dremotepath}")
                 if settings.repair_on_failure:
-                    repair_remote(settings, "missing", row, manifest, stats)
+                    to_repair.append(("missing", row))
             else:
                 if dhashlocal and rem_hash != dhashlocal:
                     mismatch += 1
                     logger.warning(f"Hash mismatch for {dremotepath}")
                     if settings.repair_on_failure:
-                        repair_remote(settings, "mismatch", row, manifest, stats)
+                        to_repair.append(("mismatch", row))
 
             stats.increment(StatKey.VERIFIED)
         except (KeyboardInterrupt, InterruptedError):
@@ -224,11 +284,15 @@ def integrity_check(settings: Settings, manifest: ManifestManager, stats: Thread
             logger.error(f"Failed to verify email {row['hash']}: {e}")
             stats.increment(StatKey.FAILED)
 
-        if i % 100 == 0 or i == total:
-            remaining = total - i
-            logger.info(f"[Progress] Verified {i}/{total} entries ({remaining} remaining)")
+        if checked % 100 == 0:
+            logger.info(f"[Progress] Verified {checked}/{total} entries")
 
+    logger.info(f"Verified {checked} synced entries.")
     logger.info(f"Verification result: missing={missing}, mismatched={mismatch}")
 
+    if to_repair:
+        with db.RemotePathBatch(settings.db_path) as remote_paths:
+            repair_rows(settings, to_repair, manifest, stats, remote_paths)
+
     # upload updated manifest after repairs
     manifest.upload_manifest_if_needed()
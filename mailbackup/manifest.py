@@ -17,7 +17,7 @@ import json
 import threading
 import uuid
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
 from mailbackup.config import Settings
 from mailbackup.logger import get_logger
@@ -25,18 +25,17 @@ from mailbackup.rclone import rclone_copyto, rclone_lsjson, rclone_deletefile, r
 from mailbackup.utils import atomic_write_text, sha256_bytes, write_json_atomic
 
 
+def parse_manifest_csv(data: bytes) -> Dict[str, str]:
+    """Parse raw manifest.csv content ("sha,remote_path" lines, LF/CRLF/CR endings) into {remote_path: sha}."""
+    text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    pairs = (line.partition(",") for line in text.split("\n"))
+    return {rpath.strip(): sha.strip() for sha, sep, rpath in pairs if sep}
+
+
 def load_manifest_csv(path: Path) -> Dict[str, str]:
-    entries: Dict[str, str] = {}
     if not path.exists():
-        return entries
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or "," not in line:
-                continue
-            sha, rpath = line.split(",", 1)
-            entries[rpath.strip()] = sha.strip()
-    return entries
+        return {}
+    return parse_manifest_csv(path.read_bytes())
 
 
 def _manifest_dict_to_lines(d: Dict[str, str]) -> List[str]:
@@ -74,9 +73,20 @@ class ManifestManager:
 
         The queue is persisted to disk immediately so entries survive hard process kills.
         """
+        self.queue_entries([(remote_path, sha256_hash)])
+
+    def queue_entries(self, entries: Iterable[Tuple[str, str]]) -> None:
+        """
+        Add several (remote_path, sha256) entries to the manifest queue at once.
+
+        The queue is locked and persisted a single time for the whole batch.
+        """
+        entries = list(entries)
+        if not entries:
+            return
         # threadsafe: add and persist immediately to survive hard kills
         with self._lock:
-            self._manifest_queue[remote_path] = sha256_hash
+            self._manifest_queue.update(entries)
             try:
                 write_json_atomic(self.manifest_queue_dump, self._manifest_queue)
                 self.logger.debug(f"Persisted manifest queue ({len(self._manifest_queue)} entries)")
@@ -156,11 +166,9 @@ class ManifestManager:
         rclone_copyto(self.manifest_remote_path, str(remote_tmp), check=False)
         if not remote_tmp.exists():
             return {}, ""
-        with open(remote_tmp, "rb") as f:
-            data = f.read()
-        sha = sha256_bytes(data)
-        entries = load_manifest_csv(remote_tmp)
-        return entries, sha
+        # Read once: the same bytes give the CAS hash and the entries
+        data = remote_tmp.read_bytes()
+        return parse_manifest_csv(data), sha256_bytes(data)
 
     def _cleanup_remote_temp_manifests(self) -> None:
         try:
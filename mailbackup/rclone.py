@@ -16,7 +16,7 @@ def _run_rclone(*args: Union[str, Path], check: bool = True, on_chunk: Optional[
         return run_cmd(*cmd, check=check)
     else:
         from mailbackup.utils import run_streaming
-        return run_streaming("RCLONE", cmd, ignore_errors=check, on_chunk=on_chunk, text_mode=False)
+        return run_streaming("RCLONE", cmd, ignore_errors=not check, on_chunk=on_chunk, text_mode=False)
 
 
 def set_rclone_defaults(log_level="INFO", transfers=4, multi_thread_streams=4):
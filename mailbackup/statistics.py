@@ -43,7 +43,8 @@ class ThreadSafeStats:
     def __init__(self):
         """Initialize with empty counters and a lock."""
         self._counters: Dict[StatKey, int] = {}
-        self._lock = threading.RLock()
+        # No method re-enters the lock, so a plain Lock is enough and cheaper than an RLock
+        self._lock = threading.Lock()
 
     def increment(self, key: StatKey, value: int = 1) -> None:
         """
@@ -121,10 +122,7 @@ class ThreadSafeStats:
             Formatted status string with all counters
         """
         snapshot = self.get_all()
-        txt = f" | "
-        for stat in StatKey:
-            txt += f"{stat.value}: {snapshot.get(stat, 0)} | "
-        return txt
+        return " | " + "".join(f"{stat.value}: {snapshot.get(stat, 0)} | " for stat in StatKey)
 
 
 class StatusThread:
@@ -158,7 +156,9 @@ class StatusThread:
             int_mgr = get_global_interrupt_manager()
             while not self._stop_event.wait(self.interval):
                 if int_mgr.is_interrupted():
-                    self.stop()
+                    # Wind down from inside the thread; stop() would try to join this very thread
+                    self._stop_event.set()
+                    return
                 # logger.status is registered at runtime by setup_logger; call via getattr
                 fn = getattr(self.logger, "status", None)
                 if callable(fn):
@@ -173,7 +173,8 @@ class StatusThread:
     def stop(self):
         """Stop the status reporting thread."""
         self._stop_event.set()
-        if self._thread is not None:
+        # The event wakes the reporter immediately, so this join returns as soon as it is done
+        if self._thread is not None and self._thread is not threading.current_thread():
             self._thread.join(timeout=2.0)
 
     def get_status_summary(self) -> str:
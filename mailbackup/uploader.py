@@ -103,7 +103,8 @@ def upload_email(row: Row, settings: Settings, manifest: ManifestManager, stats:
                 continue
             # verification: stream remote file and compare SHA256 to local computed hash
             # this is a defensive step against partial/garbled uploads.
-            remote_map = remote_hash(settings, remote_path=remote_base)
+            # Only email.eml is hashed; leftovers from earlier attempts in the folder are not.
+            remote_map = remote_hash(settings, file_pattern="email.eml", remote_path=remote_base)
             logger.debug(f"Remote map: {remote_map}")
             try:
                 if remote_map is None:
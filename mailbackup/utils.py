@@ -9,8 +9,8 @@ Utility helpers shared across the package:
 - date parsing
 - sha256
 - subprocess run wrapper
-- atomic JSON write
-- docset-related helpers (build_info_json, load_attachments)
+- JSON encode/decode and atomic JSON write (orjson when available)
+- docset-related helpers (build_info_json, load_attachments, clone_file)
 """
 
 from __future__ import annotations
@@ -21,17 +21,32 @@ import json
 import logging
 import os
 import re
+import shutil
 import signal
 import subprocess
+import tempfile
 import time
 import uuid
-from contextlib import contextmanager
+from contextlib import chdir
 from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING, Callable
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING, Callable
 
 import unicodedata
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional speedup, stdlib json is used otherwise
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; pipes keep the OS default size there
+    fcntl = None
+
+# Pipe capacity requested for binary subprocess output (Linux default is 64 KiB)
+STREAM_PIPE_SIZE = 1024 * 1024
+
 if TYPE_CHECKING:
     from mailbackup.config import Settings
 
@@ -42,21 +57,29 @@ from mailbackup.rclone import rclone_copyto, rclone_deletefile, rclone_moveto, r
 # Import StatusThread from statistics module for backward compatibility
 
 
+# Windows-unsafe characters and ASCII control characters, mapped to "_"
+_SANITIZE_TABLE = str.maketrans({**{c: "_" for c in '<>:"/\\|?*'}, **{chr(i): "_" for i in range(0x20)}})
+
+
 def sanitize(s: Optional[str]) -> str:
     if not s:
         return "unknown"
     s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-    s = re.sub(r'[<>:"/\\|?*\x00-\x1F]', "_", s)
-    s = re.sub(r"\s+", "_", s.strip())
+    s = s.translate(_SANITIZE_TABLE)
+    # Only spaces are left as whitespace: strip and collapse runs into "_"
+    s = "_".join(s.split())
     return s[:80]
 
 
 def sha256(path: Path) -> str:
-    h = hashlib.sha256()
+    """Return the SHA256 hexdigest of a file, hashed by hashlib.file_digest in C without loading it whole."""
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        return sha256_fileobj(f)
+
+
+def sha256_fileobj(f: BinaryIO) -> str:
+    """Return the SHA256 hexdigest of an open binary file, read from its current position to the end."""
+    return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 def run_cmd(*args: str, check: bool = True, fatal: bool = False) -> Union[
@@ -116,14 +139,35 @@ def parse_year_and_ts(date_h: Optional[str]) -> Tuple[int, str]:
     return dt.year, dt.strftime("%Y-%m-%d_%H-%M-%S")
 
 
+def dumps_json_bytes(data: Any) -> bytes:
+    """
+    Serialize `data` as indented UTF-8 JSON bytes.
+    Uses orjson when installed, otherwise the stdlib encoder with the same layout.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(text: Union[str, bytes]) -> Any:
+    """
+    Parse JSON text or UTF-8 bytes.
+    Uses orjson when installed, otherwise the stdlib decoder; both raise json.JSONDecodeError.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
 def write_json_atomic(path: Path, data: Any) -> None:
     """
     Atomically write JSON to `path`. Logs the write at debug level.
     """
     _logger = get_logger(__name__)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    payload = dumps_json_bytes(data)
+    with open(tmp, "wb") as f:
+        f.write(payload)
         f.flush()
         os.fsync(f.fileno())
     os.replace(tmp, path)
@@ -143,8 +187,7 @@ def safe_write_json(path: Path, data: Any) -> None:
     except Exception:
         _logger.debug(f"Failed to write JSON atomically to {path}, retry with best effort fallback")
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            path.write_bytes(dumps_json_bytes(data))
         except Exception as e:
             _logger.error(f"Failed to write JSON to {path}: {e}")
             raise
@@ -201,11 +244,35 @@ def unique_path_for_filename(outdir: Path, filename: str) -> Path:
     return candidate
 
 
+def clone_file(src: Path, dst: Path) -> None:
+    """
+    Make dst a copy of src for a short-lived docset, replacing any existing dst.
+
+    Hardlinks when src and dst share a filesystem, so no bytes are copied; falls
+    back to shutil.copy2 (kernel sendfile, mtime kept as a link would) across
+    devices or where links are not supported. Callers must not modify dst in
+    place. Raises FileNotFoundError if src is missing.
+    """
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+        return
+    except FileNotFoundError:
+        raise
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+
+
 def load_attachments(attach_json: Optional[str]) -> List[Path]:
-    if not attach_json:
+    # Most rows carry no attachments; skip the JSON parser entirely for them
+    if not attach_json or attach_json == "[]":
         return []
     try:
-        data = json.loads(attach_json)
+        data = loads_json(attach_json)
         if isinstance(data, list):
             return [Path(p) for p in data if isinstance(p, str)]
     except json.JSONDecodeError:
@@ -253,14 +320,9 @@ def build_info_json(
     }
 
 
-@contextmanager
-def working_dir(path: Path):
-    prev = Path.cwd()
-    try:
-        os.chdir(path)
-        yield
-    finally:
-        os.chdir(prev)
+def working_dir(path: Path) -> chdir:
+    """Change into `path` for the duration of a with block; the previous cwd is restored on exit."""
+    return chdir(path)
 
 
 def ensure_dirs(*paths: Path) -> None:
@@ -268,9 +330,33 @@ def ensure_dirs(*paths: Path) -> None:
         p.mkdir(parents=True, exist_ok=True)
 
 
+# Signals that trigger a safe shutdown; SIGHUP (closed terminal/SSH session) is not available on Windows
+INTERRUPT_SIGNALS = tuple(
+    getattr(signal, name) for name in ("SIGINT", "SIGTERM", "SIGHUP") if hasattr(signal, name)
+)
+
+
 def install_signal_handlers(on_interrupt):
-    signal.signal(signal.SIGINT, on_interrupt)
-    signal.signal(signal.SIGTERM, on_interrupt)
+    for signum in INTERRUPT_SIGNALS:
+        signal.signal(signum, on_interrupt)
+
+
+def _grow_pipe(pipe) -> None:
+    """
+    Best-effort enlarge the pipe buffer to STREAM_PIPE_SIZE.
+
+    The child keeps writing (e.g. rclone downloading) while on_chunk consumes
+    earlier data, so a deeper pipe lets the transfer run ahead instead of
+    stalling whenever the reader is briefly busy.
+    """
+    set_size = getattr(fcntl, "F_SETPIPE_SZ", None)
+    if set_size is None or pipe is None:
+        return
+    try:
+        fcntl.fcntl(pipe.fileno(), set_size, STREAM_PIPE_SIZE)
+    except OSError:
+        # Above /proc/sys/fs/pipe-max-size for unprivileged users; keep the default
+        pass
 
 
 def run_streaming(label: str, cmd: list[str], ignore_errors: bool = True,
@@ -294,15 +380,21 @@ def run_streaming(label: str, cmd: list[str], ignore_errors: bool = True,
     logger.debug(f"Command: {' '.join(cmd)}")
     start = time.time()
 
+    # In binary mode stdout is data (e.g. a file being hashed), so stderr log
+    # lines must not be mixed into it; they are spooled and logged afterwards.
+    stderr_sink = subprocess.STDOUT if text_mode else tempfile.TemporaryFile()
     process = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
+        stderr=stderr_sink,
         text=text_mode,
         bufsize=1 if text_mode else 0,
         universal_newlines=text_mode,
     )
 
+    if not text_mode:
+        _grow_pipe(process.stdout)
+
     try:
         assert process.stdout is not None
         if text_mode:
@@ -335,7 +427,7 @@ def run_streaming(label: str, cmd: list[str], ignore_errors: bool = True,
 
         else:
             # Binary mode (used for hashing, etc.)
-            for chunk in iter(lambda: process.stdout.read(65536), b""):
+            for chunk in iter(lambda: process.stdout.read(STREAM_PIPE_SIZE), b""):
                 if on_chunk:
                     on_chunk(chunk)
     except Exception as e:
@@ -343,6 +435,12 @@ def run_streaming(label: str, cmd: list[str], ignore_errors: bool = True,
     finally:
         rc = process.wait()
         elapsed = time.time() - start
+        if not text_mode:
+            stderr_sink.seek(0)
+            for line in stderr_sink.read().decode(errors="replace").splitlines():
+                if line.strip():
+                    logger.debug(f"[{label}] {line.strip()}")
+            stderr_sink.close()
 
     if rc < 0:
         logger.error(f"Interrupt for stream {label}")
@@ -358,6 +456,19 @@ def run_streaming(label: str, cmd: list[str], ignore_errors: bool = True,
         return False
 
 
+# rclone errors raised before any bytes reach the remote; no temp object to clean up
+_NOTHING_UPLOADED_MARKERS = (
+    "Failed to open source",
+    "source file not found",
+    "Failed to create file system",
+)
+
+
+def _nothing_uploaded(res) -> bool:
+    stderr = getattr(res, "stderr", None)
+    return isinstance(stderr, str) and any(m in stderr for m in _NOTHING_UPLOADED_MARKERS)
+
+
 # helper: atomic upload of a single local file to a remote final path
 def atomic_upload_file(local_path: Path, remote_final: str) -> bool:
     _logger = get_logger(__name__)
@@ -366,7 +477,8 @@ def atomic_upload_file(local_path: Path, remote_final: str) -> bool:
     res = rclone_copyto(local_path, remote_tmp, check=False)
     if getattr(res, "returncode", 1) != 0:
         _logger.error(f"atomic_upload_file: copyto failed for {local_path} -> {remote_tmp}")
-        rclone_deletefile(remote_tmp, check=False)
+        if not _nothing_uploaded(res):
+            rclone_deletefile(remote_tmp, check=False)
         return False
     res2 = rclone_moveto(remote_tmp, remote_final, check=False)
     if getattr(res2, "returncode", 1) != 0:
@@ -393,7 +505,7 @@ def compute_remote_sha256(settings: Settings, remote_path: str) -> str:
 
         # Run rclone cat
         h = hashlib.sha256()
-        ok = rclone_cat(f"{settings.remote}/{remote_path}", check=True, on_chunk=lambda chunk: h.update(chunk))
+        ok = rclone_cat(f"{settings.remote}/{remote_path}", check=True, on_chunk=h.update)
 
         if not ok:
             raise
@@ -421,54 +533,118 @@ def silent_warn(logger: logging.Logger, msg: str, silent: bool = False):
         logger.warning(msg)
 
 
+class _HashsumStream:
+    """
+    Incremental parser for `rclone hashsum` output.
+
+    Chunks are fed as they arrive from the subprocess so the full listing is
+    never buffered. Lines whose first field is not a hex digest (e.g. rclone
+    log output interleaved on the same stream) are ignored.
+    """
+
+    def __init__(self, remote_map: Dict[str, str], prefix: str = ""):
+        self._map = remote_map
+        self._prefix = prefix
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> None:
+        lines = (self._pending + chunk).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self) -> None:
+        if self._pending:
+            self._parse_line(self._pending)
+            self._pending = b""
+
+    def _parse_line(self, line: bytes) -> None:
+        parts = line.strip().split(None, 1)
+        # translate() deletes every hex digit in C; anything left over means this is not a digest
+        if len(parts) == 2 and not parts[0].translate(None, _HEX_DIGITS):
+            self._map[self._prefix + parts[1].strip().decode("utf-8", "replace")] = parts[0].decode("ascii")
+
+
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+
+
+def _hashsum_into(remote_map: Dict[str, str], remote_path: str, file_pattern: str, prefix: str,
+                  *extra: str) -> bool:
+    """Run `rclone hashsum SHA256` over remote_path, parsing its output into remote_map as it streams in."""
+    _logger = get_logger(__name__)
+    parser = _HashsumStream(remote_map, prefix)
+    try:
+        ok = rclone_hashsum(
+            "SHA256",
+            remote_path,
+            "--include",
+            file_pattern,
+            "--recursive",
+            *extra,
+            check=False,
+            on_chunk=parser.feed,
+        )
+    except (KeyboardInterrupt, InterruptedError):
+        raise
+    except Exception as e:
+        _logger.debug(f"rclone hashsum failed for {remote_path}: {e}")
+        ok = False
+    parser.close()
+    return bool(ok)
+
+
 def remote_hash(settings: Settings, file_pattern: str = '*', remote_path: str = None, silent_logging: bool = True) -> \
         dict[str, str] | None:
+    """
+    Return {path: sha256} for the files under remote_path matching file_pattern, or None.
+
+    Keys are relative to settings.remote whichever step produced them:
+    1. `rclone hashsum` using hashes the backend computes itself
+    2. `rclone hashsum --download`, which streams and hashes every file in one rclone call
+    3. as a last resort, lsjson plus one `rclone cat` per file on the hash worker threads
+    """
     _logger = get_logger(__name__)
     remote_map: Dict[str, str] = {}
 
     if remote_path is None:
         remote_path = settings.remote
+    prefix = remote_path[len(settings.remote):] if remote_path.startswith(settings.remote) else remote_path
+    if prefix != "" and prefix[-1:] != "/":
+        prefix = f"{prefix}/"
 
-    # Step 1: try rclone hashsum
-    res = rclone_hashsum(
-        "SHA256",
-        remote_path,
-        "--include",
-        file_pattern,
-        "--recursive",
-        check=False,
-    )
-    if res.returncode == 0:
-        for line in (res.stdout or "").splitlines():
-            parts = line.strip().split(None, 1)
-            if len(parts) == 2:
-                hash_val, path = parts
-                remote_map[path.strip()] = hash_val.strip()
+    # Step 1: try rclone hashsum, parsing its output as it streams in
+    ok = _hashsum_into(remote_map, remote_path, file_pattern, prefix)
+    if ok:
         if remote_map:
             silent_info(_logger, f"Remote hashsum succeeded with {len(remote_map)} entries.", silent_logging)
         else:
             silent_warn(_logger, "rclone hashsum returned no results.", silent_logging)
     else:
-        silent_warn(_logger, "Remote does not support hashsum SHA256. Falling back to streaming...", silent_logging)
+        silent_warn(_logger, "Remote does not support hashsum SHA256. Hashing downloaded files instead...",
+                    silent_logging)
+        # One rclone process downloads and hashes all files instead of one process per file
+        if _hashsum_into(remote_map, remote_path, file_pattern, prefix, "--download") and remote_map:
+            silent_info(_logger, f"Downloaded hashsum succeeded with {len(remote_map)} entries.", silent_logging)
+        else:
+            silent_warn(_logger, "Downloaded hashsum failed. Falling back to streaming...", silent_logging)
 
-    # Step 2: fallback — list all remote files and compute hashes locally
+    # Step 3: fallback — list all remote files and compute hashes locally
     if not remote_map:
+        # Directories would only cost a failing rclone cat each in the hash workers
         res2 = rclone_lsjson(
             remote_path,
             "--include",
             file_pattern,
             "--recursive",
+            "--files-only",
             check=False,
         )
         if res2.returncode != 0:
             _logger.error("Failed to list remote contents.")
             return None
-        files = json.loads(res2.stdout or "[]")
-        if remote_path.startswith(settings.remote):
-            remote_path = remote_path[len(settings.remote):]
-        if remote_path != "" and remote_path[-1:] != "/":
-            remote_path = f"{remote_path}/"
-        relpaths = [f"{remote_path}{entry['Path']}" for entry in files if "Path" in entry]
+        files = loads_json(res2.stdout or "[]")
+        relpaths = [f"{prefix}{entry['Path']}" for entry in files
+                    if "Path" in entry and not entry.get("IsDir")]
         silent_info(_logger,
                     f"Found {len(relpaths)} remote files — computing hashes with {settings.max_hash_threads} threads...",
                     silent_logging
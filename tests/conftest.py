@@ -3,48 +3,66 @@
 Shared pytest fixtures and configuration for mailbackup tests.
 """
 
-import sys
-from pathlib import Path
+import hashlib
+import shutil
+import types
+from unittest.mock import MagicMock
 
 import pytest
 
-# Ensure parent directory is in path for package imports
-parent_dir = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(parent_dir))
-
-# Import from the mailbackup package
+# The package is importable from the repository root (pytest.ini sets pythonpath)
+# or from an editable install; no sys.path manipulation is needed here.
 from mailbackup import config, db
+from mailbackup.manifest import ManifestManager
 
 Settings = config.Settings
 ensure_schema = db.ensure_schema
 
 
+class FakeManifest:
+    """
+    Lightweight stand-in for ManifestManager.
+
+    Every public ManifestManager method is a MagicMock, so tests can assert calls
+    just like with Mock(spec=ManifestManager) without re-running spec
+    introspection per test. Unknown attributes still raise AttributeError.
+    """
+
+    METHODS = tuple(
+        name for name in dir(ManifestManager)
+        if not name.startswith("_") and callable(getattr(ManifestManager, name))
+    )
+
+    def __init__(self, manifest_path=None):
+        for name in self.METHODS:
+            setattr(self, name, MagicMock(name=name))
+        self.manifest_path = manifest_path
+
+
 @pytest.fixture
 def tmp_dir(tmp_path):
     """Returns a temporary directory Path."""
     return tmp_path
 
 
-@pytest.fixture
-def sample_maildir(tmp_path):
-    """Create a sample maildir structure for testing."""
-    maildir = tmp_path / "maildir"
-    maildir.mkdir()
-
-    # Create some sample folders
-    inbox = maildir / "INBOX" / "cur"
-    inbox.mkdir(parents=True)
-
-    sent = maildir / "Sent" / "cur"
-    sent.mkdir(parents=True)
+@pytest.fixture(scope="session")
+def maildir_template(tmp_path_factory):
+    """Build the sample maildir layout once per session; copied per test by sample_maildir."""
+    maildir = tmp_path_factory.mktemp("maildir_template") / "maildir"
+    for folder in ("INBOX", "Sent", "Spam"):
+        (maildir / folder / "cur").mkdir(parents=True)
+    return maildir
 
-    spam = maildir / "Spam" / "cur"
-    spam.mkdir(parents=True)
 
+@pytest.fixture
+def sample_maildir(tmp_path, maildir_template):
+    """Create a sample maildir structure (INBOX, Sent, Spam) for testing."""
+    maildir = tmp_path / "maildir"
+    shutil.copytree(maildir_template, maildir)
     return maildir
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_email():
     """Return a simple RFC-822 compliant email message."""
     return b"""From: test@example.com
@@ -58,7 +76,13 @@ This is a test email body.
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_email_digest(sample_email):
+    """Return (bytes, sha256 hexdigest) of sample_email, hashed once per session."""
+    return sample_email, hashlib.sha256(sample_email).hexdigest()
+
+
+@pytest.fixture(scope="session")
 def sample_email_with_attachment():
     """Return an email with an attachment."""
     return b"""From: sender@example.com
@@ -85,22 +109,34 @@ JVBERi0xLjQKJeLjz9MKMSAwIG9iago8PAovVHlwZSAvQ2F0YWxvZwovUGFnZXMgMiAwIFIKPj4K
 """
 
 
+@pytest.fixture(scope="session")
+def schema_db(tmp_path_factory):
+    """Initialize the schema once per session; copied per test by test_db."""
+    db_path = tmp_path_factory.mktemp("schema") / "schema.db"
+    ensure_schema(db_path)
+    # Fold the WAL into the main file so a plain file copy carries the schema
+    db.get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    return db_path
+
+
 @pytest.fixture
-def test_db(tmp_path):
+def test_db(tmp_path, schema_db):
     """Create a test database with schema initialized."""
     db_path = tmp_path / "test.db"
-    ensure_schema(db_path)
-    return db_path
+    shutil.copyfile(schema_db, db_path)
+    yield db_path
+    # Don't let cached connections to per-test databases pile up over the session
+    db.close_all_connections()
 
 
 @pytest.fixture
-def test_settings(tmp_path):
-    """Create a Settings object with test paths."""
+def test_settings(tmp_path, test_db):
+    """Create a Settings object with test paths, backed by the schema-ready test_db."""
     return Settings(
         maildir=tmp_path / "maildir",
         attachments_dir=tmp_path / "attachments",
         remote="test-remote:Backups/Email",
-        db_path=tmp_path / "state.db",
+        db_path=test_db,
         log_path=tmp_path / "test.log",
         tmp_dir=tmp_path / "staging",
         archive_dir=tmp_path / "archives",
@@ -114,6 +150,7 @@ def test_settings(tmp_path):
         max_hash_threads=2,
         max_upload_workers=2,
         max_extract_workers=1,
+        extract_processes=0,
         upload_batch_size=100,
         status_interval=10,
         log_level="INFO",
@@ -127,6 +164,12 @@ def test_settings(tmp_path):
     )
 
 
+@pytest.fixture
+def fake_manifest():
+    """A fresh FakeManifest for each test."""
+    return FakeManifest()
+
+
 @pytest.fixture
 def mock_rclone(mocker):
     """Mock rclone command calls."""
@@ -137,3 +180,23 @@ def mock_rclone(mocker):
         stderr=""
     )
     return mock_run
+
+
+@pytest.fixture
+def rclone_mocks(mocker):
+    """Patch the rclone wrappers used by mailbackup.utils; tests set return values as needed."""
+    return types.SimpleNamespace(
+        copyto=mocker.patch("mailbackup.utils.rclone_copyto"),
+        moveto=mocker.patch("mailbackup.utils.rclone_moveto"),
+        deletefile=mocker.patch("mailbackup.utils.rclone_deletefile"),
+        cat=mocker.patch("mailbackup.utils.rclone_cat"),
+        hashsum=mocker.patch("mailbackup.utils.rclone_hashsum"),
+        lsjson=mocker.patch("mailbackup.utils.rclone_lsjson"),
+    )
+
+
+@pytest.fixture(scope="session")
+def cli_parser():
+    """A single CLI argument parser shared by all tests (parsing does not mutate it)."""
+    from mailbackup.__main__ import build_parser
+    return build_parser()
@@ -9,10 +9,30 @@ import time
 import pytest
 
 from mailbackup.executor import (
+    InterruptManager,
     create_managed_executor,
     get_global_interrupt_manager,
 )
 
+# Upper bound for any handshake; only reached if synchronization breaks
+WAIT_TIMEOUT = 5.0
+# An interrupted map() must return well before any handshake could time out
+INTERRUPT_DEADLINE = 0.5
+
+
+@pytest.fixture
+def manager():
+    """A private interrupt manager so tests never share interrupt state."""
+    return InterruptManager()
+
+
+@pytest.fixture
+def release():
+    """Event that releases blocked worker tasks; always set on teardown so no worker lingers."""
+    event = threading.Event()
+    yield event
+    event.set()
+
 
 class TestInterruptHandlingIntegration:
     """Integration tests for interrupt handling."""
@@ -25,7 +45,7 @@ class TestInterruptHandlingIntegration:
         assert manager1 is manager2
 
     def test_executor_registers_with_global_manager(self):
-        """Test that executors register with global manager."""
+        """Test that executors register with global manager by default."""
         manager = get_global_interrupt_manager()
         manager.reset()  # Clear any previous state
 
@@ -36,83 +56,98 @@ class TestInterruptHandlingIntegration:
         # After context exit, executor should be unregistered
         assert manager.get_executor_count() == 0
 
-    def test_global_interrupt_stops_all_executors(self):
+    def test_local_manager_is_isolated_from_global(self, manager):
+        """Test that an injected manager keeps executors off the global manager."""
+        global_manager = get_global_interrupt_manager()
+        global_manager.reset()
+
+        with create_managed_executor(max_workers=1, name="Local", manager=manager):
+            assert manager.get_executor_count() == 1
+            assert global_manager.get_executor_count() == 0
+            manager.interrupt_all()
+
+        assert manager.is_interrupted()
+        assert not global_manager.is_interrupted()
+
+    def test_global_interrupt_stops_all_executors(self, manager, release):
         """Test that global interrupt stops all executors."""
-        manager = get_global_interrupt_manager()
-        manager.reset()
+        max_workers = 2
+        started = threading.Barrier(parties=max_workers + 1)
 
-        def slow_task(x):
-            time.sleep(0.5)
+        def blocking_task(x):
+            started.wait(timeout=WAIT_TIMEOUT)
+            release.wait(timeout=WAIT_TIMEOUT)
             return x * 2
 
-        def interrupt_after_delay():
-            time.sleep(0.2)
+        def interrupt_when_busy():
+            # Fire as soon as every worker is inside a task
+            started.wait(timeout=WAIT_TIMEOUT)
             manager.interrupt_all()
+            release.set()
 
-        interrupt_thread = threading.Thread(target=interrupt_after_delay)
+        interrupt_thread = threading.Thread(target=interrupt_when_busy)
         interrupt_thread.start()
 
         start = time.time()
-        with create_managed_executor(max_workers=2, name="Test") as executor:
+        with create_managed_executor(max_workers=max_workers, name="Test", manager=manager) as executor:
             # Should raise KeyboardInterrupt when interrupted
             with pytest.raises(KeyboardInterrupt):
-                executor.map(slow_task, range(20))
+                executor.map(blocking_task, range(6))
 
         elapsed = time.time() - start
         interrupt_thread.join()
 
-        # Should complete much faster than 10 seconds (20 tasks * 0.5s / 2 workers)
-        assert elapsed < 5.0, f"Took {elapsed}s, expected < 5s due to interrupt"
-
-        # Reset for next test
-        manager.reset()
-
-    def test_interrupt_preserves_completed_results(self):
-        """Test that interrupt raises KeyboardInterrupt."""
-        manager = get_global_interrupt_manager()
-        manager.reset()
+        # Remaining tasks must have been cancelled rather than waited for
+        assert elapsed < INTERRUPT_DEADLINE, f"Took {elapsed}s, expected < {INTERRUPT_DEADLINE}s due to interrupt"
 
+    def test_interrupt_preserves_completed_results(self, manager, release):
+        """Test that interrupt raises KeyboardInterrupt after some tasks have run."""
+        max_workers = 2
         completed_count = [0]
         lock = threading.RLock()
+        progressed = threading.Semaphore(0)
 
         def task_with_tracking(x):
             result = x * 2
             with lock:
                 completed_count[0] += 1
-            time.sleep(0.1)  # Small delay
+            progressed.release()
+            release.wait(timeout=WAIT_TIMEOUT)
             return result
 
         def interrupt_after_some_complete():
-            # Wait for at least a few tasks to complete
-            time.sleep(0.3)
+            # Wait until every worker has done its work
+            for _ in range(max_workers):
+                progressed.acquire(timeout=WAIT_TIMEOUT)
             manager.interrupt_all()
+            release.set()
 
         interrupt_thread = threading.Thread(target=interrupt_after_some_complete)
         interrupt_thread.start()
 
-        with create_managed_executor(max_workers=2, name="Test") as executor:
+        with create_managed_executor(max_workers=max_workers, name="Test", manager=manager) as executor:
             # Should raise KeyboardInterrupt when interrupted
             with pytest.raises(KeyboardInterrupt):
                 executor.map(task_with_tracking, range(20))
 
         interrupt_thread.join()
 
-        manager.reset()
+        assert max_workers <= completed_count[0] < 20
 
-    def test_multiple_executors_coordinate_shutdown(self):
+    def test_multiple_executors_coordinate_shutdown(self, manager, release):
         """Test that multiple executors shutdown together."""
-        manager = get_global_interrupt_manager()
-        manager.reset()
-
-        results_collected = {"ex1": False, "ex2": False}
+        max_workers = 1
+        started = threading.Barrier(parties=max_workers + 1)
 
-        def slow_task(x):
-            time.sleep(0.3)
+        def blocking_task(x):
+            started.wait(timeout=WAIT_TIMEOUT)
+            release.wait(timeout=WAIT_TIMEOUT)
             return x
 
         def interrupt_early():
-            time.sleep(0.2)
+            started.wait(timeout=WAIT_TIMEOUT)
             manager.interrupt_all()
+            release.set()
 
         interrupt_thread = threading.Thread(target=interrupt_early)
         interrupt_thread.start()
@@ -121,48 +156,51 @@ class TestInterruptHandlingIntegration:
 
         try:
             # Start both executors
-            with create_managed_executor(max_workers=2, name="Executor1") as ex1:
+            with create_managed_executor(max_workers=max_workers, name="Executor1", manager=manager) as ex1:
                 # Executor should be registered
                 assert manager.get_executor_count() == 1
 
                 # Start processing on executor 1 - should raise KeyboardInterrupt
                 with pytest.raises(KeyboardInterrupt):
-                    ex1.map(slow_task, range(10))
+                    ex1.map(blocking_task, range(5))
         finally:
             interrupt_thread.join()
 
         elapsed = time.time() - start
 
         # Should complete quickly due to interrupt
-        assert elapsed < 3.0
+        assert elapsed < INTERRUPT_DEADLINE
 
         # After exit, no executors should be registered  
         assert manager.get_executor_count() == 0
 
-        manager.reset()
-
-    def test_recovery_after_interrupt(self):
+    def test_recovery_after_interrupt(self, manager, release):
         """Test that we can recover and run new tasks after interrupt."""
-        manager = get_global_interrupt_manager()
-        manager.reset()
+        max_workers = 1
+        started = threading.Barrier(parties=max_workers + 1)
+
+        def blocking_task(x):
+            # Hold the workers so the interrupt lands during execution
+            started.wait(timeout=WAIT_TIMEOUT)
+            release.wait(timeout=WAIT_TIMEOUT)
+            return x * 2
 
         def task(x):
-            # Add a small delay to ensure interrupt happens during execution
-            time.sleep(0.01)
             return x * 2
 
         # First run with interrupt
         def interrupt_quickly():
-            time.sleep(0.1)  # Give time for tasks to start
+            started.wait(timeout=WAIT_TIMEOUT)
             manager.interrupt_all()
+            release.set()
 
         interrupt_thread = threading.Thread(target=interrupt_quickly)
         interrupt_thread.start()
 
-        with create_managed_executor(max_workers=2, name="Test1") as executor:
+        with create_managed_executor(max_workers=max_workers, name="Test1", manager=manager) as executor:
             # Should raise KeyboardInterrupt when interrupted
             with pytest.raises(KeyboardInterrupt):
-                executor.map(task, range(100))
+                executor.map(blocking_task, range(8))
 
         interrupt_thread.join()
 
@@ -170,7 +208,7 @@ class TestInterruptHandlingIntegration:
         manager.reset()
 
         # Second run should work normally
-        with create_managed_executor(max_workers=2, name="Test2") as executor:
+        with create_managed_executor(max_workers=max_workers, name="Test2", manager=manager) as executor:
             results2 = executor.map(task, range(5))
 
         # All tasks in second run should complete successfully
@@ -178,3 +216,41 @@ class TestInterruptHandlingIntegration:
         assert all(r.success for r in results2)
         # Results may not be in order due to concurrency
         assert sorted([r.result for r in results2]) == [0, 2, 4, 6, 8]
+
+    def test_exit_on_error_cancels_queued_tasks(self, manager, release):
+        """Test that leaving the block with an exception drops queued, unstarted tasks."""
+        max_workers = 2
+        started = threading.Barrier(parties=max_workers + 1)
+        ran = []
+        lock = threading.Lock()
+
+        def blocking_task(x):
+            with lock:
+                ran.append(x)
+            if x < max_workers:
+                started.wait(timeout=WAIT_TIMEOUT)
+                release.wait(timeout=WAIT_TIMEOUT)
+            return x
+
+        start = time.time()
+        with pytest.raises(RuntimeError):
+            with create_managed_executor(max_workers=max_workers, name="Test", manager=manager) as executor:
+                for i in range(1000):
+                    executor.submit(blocking_task, i)
+                started.wait(timeout=WAIT_TIMEOUT)
+                # Workers finish only once the queue has been cancelled by __exit__
+                threading.Timer(0.01, release.set).start()
+                raise RuntimeError("boom")
+        elapsed = time.time() - start
+
+        assert elapsed < INTERRUPT_DEADLINE
+        # Only the tasks already running (plus any picked up before the cancel) executed
+        assert len(ran) < 1000
+
+    def test_clean_exit_drains_submitted_tasks(self, manager):
+        """Test that a clean exit waits for every submitted task."""
+        with create_managed_executor(max_workers=2, name="Test", manager=manager) as executor:
+            futures = [executor.submit(lambda x: x * 2, i) for i in range(20)]
+
+        assert all(f.done() and not f.cancelled() for f in futures)
+        assert sorted(f.result() for f in futures) == [i * 2 for i in range(20)]
@@ -135,7 +135,6 @@ JVBERi0xLjQK
         email = cur_dir / "test.eml"
         email.write_text("From: test@example.com\nSubject: Test\n\nBody")
         
-        test_settings.db_path = test_db
         test_settings.attachments_dir = tmp_path / "attachments"
         
         stats = create_stats()
@@ -171,7 +170,6 @@ class TestRunExtractorWorkflow:
         email2 = cur_dir / "2.eml"
         email2.write_text("From: test2@example.com\nSubject: Test 2\nDate: Tue, 2 Jan 2024 12:00:00 +0000\n\nBody 2")
         
-        test_settings.db_path = test_db
         test_settings.attachments_dir = tmp_path / "attachments"
         test_settings.attachments_dir.mkdir()
         
@@ -183,6 +181,25 @@ class TestRunExtractorWorkflow:
         # Should have processed emails
         assert stats[StatKey.EXTRACTED] >= 0
 
+    def test_run_extractor_walks_maildir_once(self, test_settings, tmp_path, mocker):
+        """The maildir walk that yields the total is reused as the work list."""
+        import mailbackup.extractor as extractor
+
+        test_settings.maildir = tmp_path / "maildir"
+        cur_dir = test_settings.maildir / "account" / "INBOX" / "cur"
+        cur_dir.mkdir(parents=True)
+        (cur_dir / "1.eml").write_text("From: a@example.com\nSubject: One\n\nBody 1")
+        (cur_dir / "2.eml").write_text("From: b@example.com\nSubject: Two\n\nBody 2")
+        test_settings.attachments_dir = tmp_path / "attachments"
+        walk_spy = mocker.patch("mailbackup.extractor._iter_message_paths",
+                                side_effect=extractor._iter_message_paths)
+
+        stats = create_stats()
+        run_extractor(test_settings, stats)
+
+        walk_spy.assert_called_once_with(test_settings.maildir)
+        assert stats[StatKey.EXTRACTED] == 2
+
     def test_run_extractor_with_attachments(self, test_settings, test_db, tmp_path):
         """Test run_extractor with emails containing attachments."""
         from mailbackup.extractor import run_extractor
@@ -215,7 +232,6 @@ JVBERi0xLjQK
         email = cur_dir / "email_with_att.eml"
         email.write_bytes(email_content)
         
-        test_settings.db_path = test_db
         test_settings.attachments_dir = tmp_path / "attachments"
         test_settings.attachments_dir.mkdir()
         
@@ -226,3 +242,27 @@ JVBERi0xLjQK
         
         # Should have processed
         assert True
+
+    def test_run_extractor_with_process_pool(self, test_settings, test_db, tmp_path):
+        """Test run_extractor parsing in worker processes while the DB is written by threads."""
+        import sqlite3
+
+        test_settings.maildir = tmp_path / "maildir"
+        cur_dir = test_settings.maildir / "account" / "INBOX" / "cur"
+        cur_dir.mkdir(parents=True)
+        (cur_dir / "1.eml").write_text("From: a@example.com\nSubject: One\nDate: Mon, 1 Jan 2024 12:00:00 +0000\n\nBody 1")
+        (cur_dir / "2.eml").write_text("From: b@example.com\nSubject: Two\nDate: Tue, 2 Jan 2024 12:00:00 +0000\n\nBody 2")
+        (cur_dir / "3.eml").write_text("From: c@example.com\nSubject: [SPAM] Three\n\nBody 3")
+
+        test_settings.attachments_dir = tmp_path / "attachments"
+        test_settings.extract_processes = 2
+
+        stats = create_stats()
+        run_extractor(test_settings, stats)
+
+        assert stats[StatKey.EXTRACTED] == 2
+        assert stats[StatKey.SKIPPED] == 1
+        with sqlite3.connect(test_db) as conn:
+            rows = dict(conn.execute("SELECT subject, spam FROM processed").fetchall())
+        assert rows == {"One": 0, "Two": 0, "[SPAM] Three": 1}
+        assert len(list(test_settings.attachments_dir.rglob("body.txt"))) == 2
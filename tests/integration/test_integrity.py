@@ -7,74 +7,99 @@ with mocked rclone commands and actual database/filesystem operations.
 """
 
 import json
-from mailbackup.statistics import StatKey, create_stats
-import shutil
 from unittest.mock import Mock
 
 import pytest
 
 from mailbackup.integrity import integrity_check, repair_remote, rebuild_docset
-from mailbackup.manifest import ManifestManager
+from mailbackup.statistics import StatKey, create_stats
+
+
+def _synced_row(idx: int, hash_: str, hash_sha256: str, remote_path: str) -> dict:
+    """Build a synced DB row as returned by db.fetch_synced."""
+    return {
+        "id": idx,
+        "hash": hash_,
+        "hash_sha256": hash_sha256,
+        "path": f"/path/to/email{idx}.eml",
+        "remote_path": remote_path,
+        "from_header": f"test{idx}@example.com",
+        "subject": f"Test {idx}",
+        "date_header": f"Mon, {idx} Jan 2024 12:00:00 +0000",
+        "attachments": "[]",
+        "spam": 0,
+        "processed_at": f"2024-01-0{idx} 12:00:00",
+    }
+
+
+@pytest.fixture
+def integrity_env(test_settings, mocker):
+    """
+    Prepare a manifest-based integrity run.
+
+    Returns a callable that writes the downloaded manifest.csv and feeds
+    `rows` to db.fetch_synced and db.count_synced; rclone_copyto is patched to a no-op.
+    """
+    test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
+    mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
+
+    def _setup(manifest_contents: str, rows: list[dict]) -> None:
+        (test_settings.tmp_dir / "manifest.csv").write_text(manifest_contents)
+        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=rows)
+        mocker.patch("mailbackup.integrity.db.count_synced", return_value=len(rows))
+
+    return _setup
 
 
 @pytest.mark.integration
 class TestIntegrityCheckIntegration:
     """Integration tests for integrity_check function."""
 
-    def test_integrity_check_happy_path_all_match(self, test_settings, mocker):
-        """Test successful integrity check where all remote files match local database."""
-        # Setup
-        test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
-        manifest_file = test_settings.tmp_dir / "manifest.csv"
-        manifest_file.write_text("abc123hash,2024/folder/email.eml\ndef456hash,2024/folder2/email.eml\n")
-
-        # Mock rclone copyto to copy manifest
-        mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
-
-        # Mock DB with matching data
-        db_rows = [
-            {
-                "id": 1,
-                "hash": "abc123",
-                "hash_sha256": "abc123hash",
-                "path": "/path/to/email1.eml",
-                "remote_path": "2024/folder/email.eml",
-                "from_header": "test@example.com",
-                "subject": "Test 1",
-                "date_header": "Mon, 1 Jan 2024 12:00:00 +0000",
-                "attachments": "[]",
-                "spam": 0,
-                "processed_at": "2024-01-01 12:00:00",
-            },
-            {
-                "id": 2,
-                "hash": "def456",
-                "hash_sha256": "def456hash",
-                "path": "/path/to/email2.eml",
-                "remote_path": "2024/folder2/email.eml",
-                "from_header": "test2@example.com",
-                "subject": "Test 2",
-                "date_header": "Mon, 2 Jan 2024 12:00:00 +0000",
-                "attachments": "[]",
-                "spam": 0,
-                "processed_at": "2024-01-02 12:00:00",
-            },
-        ]
-        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=db_rows)
+    @pytest.mark.parametrize(
+        "manifest_contents, rows",
+        [
+            pytest.param(
+                "abc123hash,2024/folder/email.eml\ndef456hash,2024/folder2/email.eml\n",
+                [
+                    _synced_row(1, "abc123", "abc123hash", "2024/folder/email.eml"),
+                    _synced_row(2, "def456", "def456hash", "2024/folder2/email.eml"),
+                ],
+                id="all_match",
+            ),
+            pytest.param(
+                "abc123hash,2024/folder/email.eml\n",
+                [
+                    _synced_row(1, "abc123", "abc123hash", "2024/folder/email.eml"),
+                    # Missing from manifest
+                    _synced_row(2, "def456", "def456hash", "2024/folder2/email.eml"),
+                ],
+                id="missing_remote_file",
+            ),
+            pytest.param(
+                "wronghash123,2024/folder/email.eml\n",
+                [_synced_row(1, "abc123", "correcthash456", "2024/folder/email.eml")],
+                id="hash_mismatch",
+            ),
+        ],
+    )
+    def test_integrity_check_verifies_without_repair(self, test_settings, integrity_env, manifest_contents, rows, fake_manifest):
+        """Test that every synced row is verified and nothing is repaired when repair is disabled."""
+        integrity_env(manifest_contents, rows)
+        test_settings.repair_on_failure = False
 
-        manifest = Mock(spec=ManifestManager)
-        manifest.manifest_path = test_settings.manifest_path
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
         integrity_check(test_settings, manifest, stats)
 
         # Assert
-        assert stats[StatKey.VERIFIED] == 2
+        assert stats[StatKey.VERIFIED] == len(rows)
         assert stats.get("repaired", 0) == 0
+        manifest.queue_entries.assert_not_called()
         manifest.upload_manifest_if_needed.assert_called_once()
 
-    def test_integrity_check_with_rclone_hashsum_fallback(self, test_settings, mocker):
+    def test_integrity_check_with_rclone_hashsum_fallback(self, test_settings, mocker, fake_manifest):
         """Test integrity check using rclone hashsum when manifest is missing."""
         # Mock rclone copyto to not create file (manifest missing)
         mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
@@ -101,7 +126,7 @@ class TestIntegrityCheckIntegration:
         }
         mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[db_row])
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
@@ -111,113 +136,25 @@ class TestIntegrityCheckIntegration:
         assert stats[StatKey.VERIFIED] == 1
         assert stats.get("repaired", 0) == 0
 
-    def test_integrity_check_disabled(self, test_settings, mocker):
+    def test_integrity_check_disabled(self, test_settings, mocker, fake_manifest):
         """Test that integrity check is skipped when disabled in settings."""
         test_settings.verify_integrity = False
+        mock_copyto = mocker.patch("mailbackup.integrity.rclone_copyto")
+        mock_fetch = mocker.patch("mailbackup.integrity.db.fetch_synced")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
         integrity_check(test_settings, manifest, stats)
 
-        # Assert - should exit early
+        # Assert - should exit early without any remote or DB work
         assert stats[StatKey.VERIFIED] == 0
+        assert mock_copyto.call_count == 0
+        assert mock_fetch.call_count == 0
+        manifest.upload_manifest_if_needed.assert_not_called()
 
-    def test_integrity_check_missing_remote_file(self, test_settings, mocker):
-        """Test integrity check detects missing remote files."""
-        # Setup
-        test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
-        manifest_file = test_settings.tmp_dir / "manifest.csv"
-        # Only one file in manifest
-        manifest_file.write_text("abc123hash,2024/folder/email.eml\n")
-
-        mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
-
-        # DB has two files, but manifest only has one
-        db_rows = [
-            {
-                "id": 1,
-                "hash": "abc123",
-                "hash_sha256": "abc123hash",
-                "path": "/path/to/email1.eml",
-                "remote_path": "2024/folder/email.eml",
-                "from_header": "test@example.com",
-                "subject": "Test 1",
-                "date_header": "Mon, 1 Jan 2024 12:00:00 +0000",
-                "attachments": "[]",
-                "spam": 0,
-                "processed_at": "2024-01-01 12:00:00",
-            },
-            {
-                "id": 2,
-                "hash": "def456",
-                "hash_sha256": "def456hash",
-                "path": "/path/to/email2.eml",
-                "remote_path": "2024/folder2/email.eml",  # Missing from manifest
-                "from_header": "test2@example.com",
-                "subject": "Test 2",
-                "date_header": "Mon, 2 Jan 2024 12:00:00 +0000",
-                "attachments": "[]",
-                "spam": 0,
-                "processed_at": "2024-01-02 12:00:00",
-            },
-        ]
-        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=db_rows)
-
-        # Disable repair for this test
-        test_settings.repair_on_failure = False
-
-        manifest = Mock(spec=ManifestManager)
-        stats = create_stats()
-
-        # Execute
-        integrity_check(test_settings, manifest, stats)
-
-        # Assert - should verify both but not repair
-        assert stats[StatKey.VERIFIED] == 2
-        assert stats.get("repaired", 0) == 0
-
-    def test_integrity_check_hash_mismatch(self, test_settings, mocker):
-        """Test integrity check detects hash mismatches."""
-        # Setup
-        test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
-        manifest_file = test_settings.tmp_dir / "manifest.csv"
-        # Hash in manifest doesn't match DB
-        manifest_file.write_text("wronghash123,2024/folder/email.eml\n")
-
-        mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
-
-        # DB has different hash
-        db_row = {
-            "id": 1,
-            "hash": "abc123",
-            "hash_sha256": "correcthash456",  # Mismatch!
-            "path": "/path/to/email.eml",
-            "remote_path": "2024/folder/email.eml",
-            "from_header": "test@example.com",
-            "subject": "Test",
-            "date_header": "Mon, 1 Jan 2024 12:00:00 +0000",
-            "attachments": "[]",
-            "spam": 0,
-            "processed_at": "2024-01-01 12:00:00",
-        }
-        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[db_row])
-
-        # Disable repair for this test
-        test_settings.repair_on_failure = False
-
-        manifest = Mock(spec=ManifestManager)
-        stats = create_stats()
-
-        # Execute
-        integrity_check(test_settings, manifest, stats)
-
-        # Assert
-        assert stats[StatKey.VERIFIED] == 1
-        assert stats.get("repaired", 0) == 0
-
-    def test_integrity_check_with_repair_missing_file(self, test_settings, mocker):
+    def test_integrity_check_with_repair_missing_file(self, test_settings, mocker, fake_manifest):
         """Test integrity check repairs missing remote files."""
         # Setup real filesystem for repair
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -248,8 +185,8 @@ class TestIntegrityCheckIntegration:
         }
         mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[db_row])
 
-        # Mock DB update
-        mock_update_path = mocker.patch("mailbackup.integrity.db.update_remote_path")
+        # Mock batched DB update
+        mock_update_path = mocker.patch("mailbackup.integrity.db.update_remote_paths")
 
         # Mock atomic upload to succeed
         mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
@@ -257,7 +194,7 @@ class TestIntegrityCheckIntegration:
         # Enable repair
         test_settings.repair_on_failure = True
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
@@ -266,10 +203,11 @@ class TestIntegrityCheckIntegration:
         # Assert
         assert stats[StatKey.VERIFIED] == 1
         assert stats[StatKey.REPAIRED] == 1 
-        manifest.queue_entry.assert_called_once()
+        manifest.queue_entries.assert_called_once()
+        assert len(manifest.queue_entries.call_args[0][0]) == 1
         mock_update_path.assert_called_once()
 
-    def test_integrity_check_with_repair_hash_mismatch(self, test_settings, mocker):
+    def test_integrity_check_with_repair_hash_mismatch(self, test_settings, mocker, fake_manifest):
         """Test integrity check repairs hash mismatches."""
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -299,8 +237,8 @@ class TestIntegrityCheckIntegration:
         }
         mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[db_row])
 
-        # Mock DB update
-        mocker.patch("mailbackup.integrity.db.update_remote_path")
+        # Mock batched DB update
+        mocker.patch("mailbackup.integrity.db.update_remote_paths")
 
         # Mock atomic upload to succeed
         mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
@@ -308,7 +246,7 @@ class TestIntegrityCheckIntegration:
         # Enable repair
         test_settings.repair_on_failure = True
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
@@ -318,7 +256,53 @@ class TestIntegrityCheckIntegration:
         assert stats[StatKey.VERIFIED] == 1
         assert stats[StatKey.REPAIRED] == 1 
 
-    def test_integrity_check_no_remote_hashsum_available(self, test_settings, mocker):
+    def test_integrity_check_repairs_multiple_rows_in_parallel(self, test_settings, mocker, fake_manifest):
+        """Test that all collected repairs are dispatched through the worker pool."""
+        test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
+        manifest_file = test_settings.tmp_dir / "manifest.csv"
+        manifest_file.write_text("")
+
+        mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
+
+        db_rows = [
+            {
+                "id": i,
+                "hash": f"hash{i:03d}",
+                "hash_sha256": f"sha{i}",
+                "path": f"/nonexistent/email{i}.eml",
+                "remote_path": f"2024/folder{i}/email.eml",
+                "from_header": "test@example.com",
+                "subject": f"Test {i}",
+                "date_header": "Mon, 1 Jan 2024 12:00:00 +0000",
+                "attachments": "[]",
+                "spam": 0,
+                "processed_at": "2024-01-01 12:00:00",
+            }
+            for i in range(5)
+        ]
+        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=db_rows)
+        mock_update_paths = mocker.patch("mailbackup.integrity.db.update_remote_paths")
+        mock_upload = mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
+
+        test_settings.repair_on_failure = True
+
+        manifest = fake_manifest
+        stats = create_stats()
+
+        integrity_check(test_settings, manifest, stats)
+
+        assert stats[StatKey.VERIFIED] == 5
+        assert stats[StatKey.REPAIRED] == 5
+        # Only info.json exists for each rebuilt docset (no local email files)
+        assert mock_upload.call_count == 5
+        # All remote_path updates are written in one batch
+        mock_update_paths.assert_called_once()
+        assert len(mock_update_paths.call_args.args[1]) == 5
+        manifest.queue_entries.assert_called_once()
+        assert len(manifest.queue_entries.call_args[0][0]) == 5
+        manifest.queue_entry.assert_not_called()
+
+    def test_integrity_check_no_remote_hashsum_available(self, test_settings, mocker, fake_manifest):
         """Test integrity check when both manifest and hashsum are unavailable."""
         # Mock rclone copyto to not create file
         mocker.patch("mailbackup.integrity.rclone_copyto", return_value=Mock(returncode=0))
@@ -326,9 +310,7 @@ class TestIntegrityCheckIntegration:
         # Mock remote_hash to return None
         mocker.patch("mailbackup.integrity.remote_hash", return_value=None)
 
-        mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[])
-
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
@@ -338,7 +320,7 @@ class TestIntegrityCheckIntegration:
         assert stats[StatKey.VERIFIED] == 0
         assert stats.get("repaired", 0) == 0
 
-    def test_integrity_check_skips_empty_remote_path(self, test_settings, mocker):
+    def test_integrity_check_skips_empty_remote_path(self, test_settings, mocker, fake_manifest):
         """Test that entries with no remote_path are skipped."""
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -363,7 +345,7 @@ class TestIntegrityCheckIntegration:
         }
         mocker.patch("mailbackup.integrity.db.fetch_synced", return_value=[db_row])
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Execute
@@ -377,7 +359,7 @@ class TestIntegrityCheckIntegration:
 class TestRepairRemoteIntegration:
     """Integration tests for repair_remote function."""
 
-    def test_repair_remote_happy_path(self, test_settings, mocker):
+    def test_repair_remote_happy_path(self, test_settings, mocker, fake_manifest):
         """Test successful repair of a remote document set."""
         # Setup real filesystem
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -407,7 +389,7 @@ class TestRepairRemoteIntegration:
         # Mock DB update
         mock_update_path = mocker.patch("mailbackup.integrity.db.update_remote_path")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         logger = Mock()
 
@@ -419,7 +401,7 @@ class TestRepairRemoteIntegration:
         manifest.queue_entry.assert_called_once()
         mock_update_path.assert_called_once()
 
-    def test_repair_remote_with_attachments(self, test_settings, mocker):
+    def test_repair_remote_with_attachments(self, test_settings, mocker, fake_manifest):
         """Test repair with email and attachments."""
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -451,7 +433,7 @@ class TestRepairRemoteIntegration:
         mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
         mocker.patch("mailbackup.integrity.db.update_remote_path")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         logger = Mock()
 
@@ -461,7 +443,7 @@ class TestRepairRemoteIntegration:
         # Assert
         assert stats[StatKey.REPAIRED] == 1 
 
-    def test_repair_remote_upload_failure(self, test_settings, mocker):
+    def test_repair_remote_upload_failure(self, test_settings, mocker, fake_manifest):
         """Test repair handles upload failures gracefully."""
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -490,7 +472,7 @@ class TestRepairRemoteIntegration:
         # Mock DB update - should not be called on failure
         mock_update_path = mocker.patch("mailbackup.integrity.db.update_remote_path")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         logger = Mock()
 
@@ -503,7 +485,7 @@ class TestRepairRemoteIntegration:
         mock_update_path.assert_not_called()
         manifest.queue_entry.assert_not_called()
 
-    def test_repair_remote_missing_local_email(self, test_settings, mocker):
+    def test_repair_remote_missing_local_email(self, test_settings, mocker, fake_manifest):
         """Test repair when local email file is missing."""
         # Setup - don't create email file
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -526,7 +508,7 @@ class TestRepairRemoteIntegration:
         mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
         mocker.patch("mailbackup.integrity.db.update_remote_path")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         logger = Mock()
 
@@ -536,7 +518,7 @@ class TestRepairRemoteIntegration:
         # Assert - repair is attempted even without local file
         assert stats[StatKey.REPAIRED] == 1 
 
-    def test_repair_remote_missing_local_attachments(self, test_settings, mocker):
+    def test_repair_remote_missing_local_attachments(self, test_settings, mocker, fake_manifest):
         """Test repair when local attachments are missing."""
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
@@ -564,7 +546,7 @@ class TestRepairRemoteIntegration:
         mocker.patch("mailbackup.integrity.atomic_upload_file", return_value=True)
         mocker.patch("mailbackup.integrity.db.update_remote_path")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         logger = Mock()
 
@@ -579,15 +561,19 @@ class TestRepairRemoteIntegration:
 class TestRebuildDocsetIntegration:
     """Integration tests for rebuild_docset function."""
 
-    def test_rebuild_docset_integration_scenario(self, test_settings):
-        """Test rebuild_docset in realistic integration scenario."""
-        # Setup
+    @pytest.fixture
+    def email_path(self, test_settings):
+        """Create the maildir/attachments dirs and a local email; tmp_path handles cleanup."""
         test_settings.maildir.mkdir(parents=True, exist_ok=True)
         test_settings.attachments_dir.mkdir(parents=True, exist_ok=True)
 
         email_path = test_settings.maildir / "test.eml"
         email_path.write_text("From: test@example.com\nSubject: Test\n\nBody")
+        return email_path
 
+    def test_rebuild_docset_integration_scenario(self, test_settings, email_path):
+        """Test rebuild_docset in realistic integration scenario."""
+        # Setup
         attach_path = test_settings.attachments_dir / "2024" / "document.pdf"
         attach_path.parent.mkdir(parents=True, exist_ok=True)
         attach_path.write_bytes(b"PDF content here")
@@ -625,18 +611,9 @@ class TestRebuildDocsetIntegration:
         assert info_data["hash"] == "abc123"
         assert "email.eml" in info_data["remote_path"]
 
-        # Cleanup
-        shutil.rmtree(result.parent.parent, ignore_errors=True)
-
-    def test_rebuild_docset_multiple_attachments(self, test_settings):
+    def test_rebuild_docset_multiple_attachments(self, test_settings, email_path):
         """Test rebuild with multiple attachments."""
         # Setup
-        test_settings.maildir.mkdir(parents=True, exist_ok=True)
-        test_settings.attachments_dir.mkdir(parents=True, exist_ok=True)
-
-        email_path = test_settings.maildir / "test.eml"
-        email_path.write_text("From: test@example.com\nSubject: Test\n\nBody")
-
         # Create multiple attachments
         attach_dir = test_settings.attachments_dir / "2024"
         attach_dir.mkdir(parents=True, exist_ok=True)
@@ -675,18 +652,9 @@ class TestRebuildDocsetIntegration:
         assert len(list(result.glob("*.txt"))) == 1
         assert len(list(result.glob("*.jpg"))) == 1
 
-        # Cleanup
-        shutil.rmtree(result.parent.parent, ignore_errors=True)
-
-    def test_rebuild_docset_special_characters_in_filename(self, test_settings):
+    def test_rebuild_docset_special_characters_in_filename(self, test_settings, email_path):
         """Test rebuild handles special characters in filenames correctly."""
         # Setup
-        test_settings.maildir.mkdir(parents=True, exist_ok=True)
-        test_settings.attachments_dir.mkdir(parents=True, exist_ok=True)
-
-        email_path = test_settings.maildir / "test.eml"
-        email_path.write_text("From: test@example.com\nSubject: Test\n\nBody")
-
         # Attachment with special characters
         attach_path = test_settings.attachments_dir / "2024" / "file with spaces & special.pdf"
         attach_path.parent.mkdir(parents=True, exist_ok=True)
@@ -718,8 +686,3 @@ class TestRebuildDocsetIntegration:
         # Sanitized filename should not contain special chars
         assert "<" not in pdf_files[0].name
         assert ">" not in pdf_files[0].name
-
-        # Cleanup
-        shutil.rmtree(result.parent.parent, ignore_errors=True)
-
-
@@ -6,9 +6,7 @@ Consolidates tests from test_final_coverage.py and test_pipeline.py.
 
 import pytest
 from pathlib import Path
-from unittest.mock import Mock
 from mailbackup.uploader import incremental_upload
-from mailbackup.manifest import ManifestManager
 from mailbackup.statistics import create_stats, StatKey
 
 
@@ -16,40 +14,32 @@ from mailbackup.statistics import create_stats, StatKey
 class TestUploaderIntegration:
     """Integration tests for uploader module."""
 
-    def test_incremental_upload_basic(self, test_settings, test_db, tmp_path, mocker):
+    def test_incremental_upload_basic(self, test_settings, test_db, tmp_path, fake_manifest):
         """Test basic incremental upload functionality."""
         # Setup
-        test_settings.db_path = test_db
         test_settings.maildir = tmp_path / "maildir"
         test_settings.maildir.mkdir()
-        
-        # Mock dependencies
-        mocker.patch("mailbackup.uploader.db.fetch_unsynced", return_value=[])
-        mocker.patch("mailbackup.uploader.remote_hash", return_value={})
-        
-        manifest = Mock(spec=ManifestManager)
+
+        # The real (empty) test DB has nothing unsynced, so no rclone call is made
+        manifest = fake_manifest
         stats = create_stats()
         
         # Execute
         incremental_upload(test_settings, manifest, stats)
         
-        # Verify - should complete without error
-        assert stats[StatKey.BACKED_UP] >= 0
+        # Verify - nothing uploaded, manifest still flushed once
+        assert stats[StatKey.BACKED_UP] == 0
+        manifest.upload_manifest_if_needed.assert_called_once()
 
-    def test_incremental_upload_with_attachments(self, test_settings, test_db, tmp_path, mocker):
+    def test_incremental_upload_with_attachments(self, test_settings, test_db, tmp_path, fake_manifest):
         """Test incremental upload with attachments."""
         # Setup
-        test_settings.db_path = test_db
         test_settings.maildir = tmp_path / "maildir"
         test_settings.maildir.mkdir()
         test_settings.attachments_dir = tmp_path / "attachments"
         test_settings.attachments_dir.mkdir()
-        
-        # Mock dependencies
-        mocker.patch("mailbackup.uploader.db.fetch_unsynced", return_value=[])
-        mocker.patch("mailbackup.uploader.remote_hash", return_value={})
-        
-        manifest = Mock(spec=ManifestManager)
+
+        manifest = fake_manifest
         stats = create_stats()
         
         # Execute
@@ -63,40 +53,41 @@ class TestUploaderIntegration:
 class TestIncrementalUploadIntegration:
     """Integration tests for incremental upload workflow."""
 
-    def test_incremental_upload_with_real_files(self, test_settings, test_db, tmp_path, mocker):
+    def test_incremental_upload_with_real_files(self, test_settings, test_db, tmp_path, sample_email_digest,
+                                                fake_manifest, mocker):
         """Test incremental_upload with real database and files."""
-        from mailbackup.uploader import incremental_upload
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats, StatKey
-        
+        from mailbackup import db
+
+        email_bytes, email_digest = sample_email_digest
+
         # Setup
-        test_settings.db_path = test_db
         test_settings.tmp_dir = tmp_path / "tmp"
         test_settings.tmp_dir.mkdir()
         test_settings.maildir = tmp_path / "maildir"
         test_settings.maildir.mkdir()
-        
+
         # Create email file
         email_file = test_settings.maildir / "test.eml"
-        email_file.write_text("From: test@example.com\nSubject: Test\n\nBody")
-        
+        email_file.write_bytes(email_bytes)
+
         # Add to database
-        from mailbackup import db
-        db.mark_processed(test_db, "hash123", str(email_file), "test@example.com", 
-                         "Test", "2024-01-01T12:00:00", [], False)
-        
-        # Mock rclone operations
+        db.mark_processed(test_db, "hash123", str(email_file), "test@example.com",
+                          "Test", "2024-01-01T12:00:00", [], False)
+
+        # Mock rclone operations; the remote reports the precomputed digest for the uploaded email
         mocker.patch("mailbackup.uploader.atomic_upload_file", return_value=True)
-        mocker.patch("mailbackup.uploader.remote_hash", return_value={
-            "2024/2024-01-01_12-00-00_from_test@example.com_subject_Test_[hash123]/email.eml": "hash123"
-        })
-        mocker.patch("mailbackup.uploader.sha256", return_value="hash123")
-        
-        manifest = ManifestManager(test_settings)
+
+        def mock_remote_hash(settings, remote_path=None, **kwargs):
+            return {f"{remote_path[len(settings.remote):]}/email.eml": email_digest}
+
+        mocker.patch("mailbackup.uploader.remote_hash", side_effect=mock_remote_hash)
+
         stats = create_stats()
-        
+
         # Execute
-        incremental_upload(test_settings, manifest, stats)
-        
-        # Should have processed
-        assert stats[StatKey.BACKED_UP] >= 0
+        incremental_upload(test_settings, fake_manifest, stats)
+
+        # Verified against the real local hash and queued for the manifest
+        assert stats[StatKey.BACKED_UP] == 1
+        fake_manifest.queue_entry.assert_called_once()
+        assert fake_manifest.queue_entry.call_args[0][1] == email_digest
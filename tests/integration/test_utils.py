@@ -4,7 +4,9 @@ Integration tests for utils module.
 These tests cover the integration paths not covered by unit tests.
 """
 
+import hashlib
 import json
+import os
 import signal
 import subprocess
 import time
@@ -15,6 +17,8 @@ import pytest
 
 from mailbackup.statistics import StatusThread, create_stats, StatKey
 from mailbackup.utils import (
+    STREAM_PIPE_SIZE,
+    _grow_pipe,
     run_streaming,
     atomic_upload_file,
     compute_remote_sha256,
@@ -22,6 +26,7 @@ from mailbackup.utils import (
     working_dir,
     ensure_dirs,
     install_signal_handlers,
+    INTERRUPT_SIGNALS,
 )
 
 
@@ -49,103 +54,152 @@ class TestRunStreamingIntegration:
         result = run_streaming("multiline", ["printf", "line1\\nline2\\nline3"], ignore_errors=True)
         assert result is True
 
+    def test_run_streaming_binary_keeps_stderr_out_of_data(self):
+        """Log lines on stderr must not end up in the binary chunks (e.g. a hashed file)."""
+        chunks = []
+        result = run_streaming("binary", ["sh", "-c", "printf data; echo 'INFO : log line' >&2; printf more"],
+                               ignore_errors=True, on_chunk=chunks.append, text_mode=False)
+        assert result is True
+        assert b"".join(chunks) == b"datamore"
+
+    def test_run_streaming_binary_large_output(self):
+        """Output larger than the pipe buffer arrives complete and in order."""
+        h = hashlib.sha256()
+        result = run_streaming("large", ["head", "-c", "3000000", "/dev/zero"],
+                               ignore_errors=True, on_chunk=h.update, text_mode=False)
+        assert result is True
+        assert h.hexdigest() == hashlib.sha256(bytes(3000000)).hexdigest()
+
+    def test_grow_pipe_enlarges_buffer(self):
+        fcntl = pytest.importorskip("fcntl")
+        if not hasattr(fcntl, "F_GETPIPE_SZ"):
+            pytest.skip("pipe sizing is Linux-only")
+        read_fd, write_fd = os.pipe()
+        try:
+            with os.fdopen(read_fd, "rb", buffering=0) as pipe:
+                _grow_pipe(pipe)
+                assert fcntl.fcntl(pipe.fileno(), fcntl.F_GETPIPE_SZ) == STREAM_PIPE_SIZE
+        finally:
+            os.close(write_fd)
+
 
 @pytest.mark.integration
 class TestAtomicUploadIntegration:
     """Integration tests for atomic_upload_file."""
 
-    def test_atomic_upload_file_success(self, tmp_path, mocker):
+    def test_atomic_upload_file_success(self, tmp_path, rclone_mocks):
         """Test successful atomic upload."""
         local_file = tmp_path / "test.txt"
         local_file.write_text("test content")
 
         # Mock rclone operations
-        mocker.patch("mailbackup.utils.rclone_copyto", return_value=Mock(returncode=0))
-        mocker.patch("mailbackup.utils.rclone_moveto", return_value=Mock(returncode=0))
-        mocker.patch("mailbackup.utils.rclone_deletefile", return_value=Mock(returncode=0))
+        rclone_mocks.copyto.return_value = Mock(returncode=0)
+        rclone_mocks.moveto.return_value = Mock(returncode=0)
 
         result = atomic_upload_file(local_file, "remote:path/file.txt")
         assert result is True
 
-    def test_atomic_upload_file_copyto_fails(self, tmp_path, mocker):
+    def test_atomic_upload_file_copyto_fails(self, tmp_path, rclone_mocks):
         """Test atomic upload when copyto fails."""
         local_file = tmp_path / "test.txt"
         local_file.write_text("test content")
 
         # Mock rclone copyto to fail
-        mocker.patch("mailbackup.utils.rclone_copyto", return_value=Mock(returncode=1))
-        mock_delete = mocker.patch("mailbackup.utils.rclone_deletefile", return_value=Mock(returncode=0))
+        rclone_mocks.copyto.return_value = Mock(returncode=1)
 
         result = atomic_upload_file(local_file, "remote:path/file.txt")
         assert result is False
         # Should attempt cleanup
-        mock_delete.assert_called_once()
+        rclone_mocks.deletefile.assert_called_once()
+
+    def test_atomic_upload_file_copyto_fails_before_upload(self, tmp_path, rclone_mocks):
+        """Test that no cleanup is attempted when copyto never reached the remote."""
+        local_file = tmp_path / "test.txt"
+        local_file.write_text("test content")
+
+        rclone_mocks.copyto.return_value = Mock(
+            returncode=1, stderr="ERROR : Failed to create file system for \"remote:\": didn't find section in config file\n")
+
+        result = atomic_upload_file(local_file, "remote:path/file.txt")
+        assert result is False
+        rclone_mocks.deletefile.assert_not_called()
 
-    def test_atomic_upload_file_moveto_fails(self, tmp_path, mocker):
+    def test_atomic_upload_file_moveto_fails(self, tmp_path, rclone_mocks):
         """Test atomic upload when moveto fails."""
         local_file = tmp_path / "test.txt"
         local_file.write_text("test content")
 
         # Mock rclone operations
-        mocker.patch("mailbackup.utils.rclone_copyto", return_value=Mock(returncode=0))
-        mocker.patch("mailbackup.utils.rclone_moveto", return_value=Mock(returncode=1))
-        mock_delete = mocker.patch("mailbackup.utils.rclone_deletefile", return_value=Mock(returncode=0))
+        rclone_mocks.copyto.return_value = Mock(returncode=0)
+        rclone_mocks.moveto.return_value = Mock(returncode=1)
 
         result = atomic_upload_file(local_file, "remote:path/file.txt")
         assert result is False
         # Should attempt cleanup
-        mock_delete.assert_called_once()
+        rclone_mocks.deletefile.assert_called_once()
 
 
 @pytest.mark.integration
 class TestComputeRemoteHashIntegration:
     """Integration tests for compute_remote_sha256."""
 
-    def test_compute_remote_sha256_success(self, test_settings, mocker):
-        """Test computing SHA256 from remote file."""
-        # Mock rclone_cat to return some content
-        mocker.patch("mailbackup.utils.rclone_cat", return_value=Mock(
-            returncode=0,
-            stdout="test content"
-        ))
+    def test_compute_remote_sha256_success(self, test_settings, rclone_mocks):
+        """Test computing SHA256 from remote file streamed in chunks."""
+        content = b"test content" * 10000
+        rclone_mocks.cat.side_effect = _fake_cat(content)
 
         result = compute_remote_sha256(test_settings, "path/to/file.txt")
-        assert result != ""
-        assert len(result) == 64  # SHA256 hex digest length
+        assert result == hashlib.sha256(content).hexdigest()
 
-    def test_compute_remote_sha256_failure(self, test_settings, mocker):
+    def test_compute_remote_sha256_failure(self, test_settings, rclone_mocks):
         """Test compute_remote_sha256 when rclone_cat fails."""
         # Mock rclone_cat to raise exception
-        mocker.patch("mailbackup.utils.rclone_cat", side_effect=Exception("Failed"))
+        rclone_mocks.cat.side_effect = Exception("Failed")
 
         result = compute_remote_sha256(test_settings, "path/to/file.txt")
         assert result == ""
 
-    def test_compute_remote_sha256_bytes_output(self, test_settings, mocker):
-        """Test compute_remote_sha256 with bytes output."""
-        # Mock rclone_cat to return bytes
-        mocker.patch("mailbackup.utils.rclone_cat", return_value=Mock(
-            returncode=0,
-            stdout=b"test content bytes"
-        ))
+    def test_compute_remote_sha256_unsuccessful_cat(self, test_settings, rclone_mocks):
+        """Test compute_remote_sha256 when rclone cat exits unsuccessfully."""
+        rclone_mocks.cat.side_effect = _fake_cat(b"partial", ok=False)
 
         result = compute_remote_sha256(test_settings, "path/to/file.txt")
-        assert result != ""
-        assert len(result) == 64
+        assert result == ""
+
+
+def _fake_cat(content: bytes, ok: bool = True):
+    """Build an rclone_cat stand-in that streams `content` to on_chunk."""
+
+    def _cat(*args, on_chunk=None, **kwargs):
+        for i in range(0, len(content), 65536):
+            on_chunk(content[i:i + 65536])
+        return ok
+
+    return _cat
+
+
+def _fake_hashsum(output: str, ok: bool = True):
+    """Build an rclone_hashsum stand-in that streams `output` to on_chunk."""
+
+    def _hashsum(*args, on_chunk=None, **kwargs):
+        data = output.encode()
+        # Feed in small pieces so lines are split across chunks
+        for i in range(0, len(data), 7):
+            on_chunk(data[i:i + 7])
+        return ok
+
+    return _hashsum
 
 
 @pytest.mark.integration
 class TestRemoteHashIntegration:
     """Integration tests for remote_hash function."""
 
-    def test_remote_hash_with_hashsum_support(self, test_settings, mocker):
+    def test_remote_hash_with_hashsum_support(self, test_settings, rclone_mocks):
         """Test remote_hash when hashsum is supported."""
         # Mock successful hashsum
         hashsum_output = "abc123  path/to/file1.eml\ndef456  path/to/file2.eml\n"
-        mocker.patch("mailbackup.utils.rclone_hashsum", return_value=Mock(
-            returncode=0,
-            stdout=hashsum_output
-        ))
+        rclone_mocks.hashsum.side_effect = _fake_hashsum(hashsum_output, ok=True)
 
         result = remote_hash(test_settings, "*.eml", silent_logging=True)
         assert result is not None
@@ -153,23 +207,53 @@ class TestRemoteHashIntegration:
         assert result["path/to/file1.eml"] == "abc123"
         assert result["path/to/file2.eml"] == "def456"
 
-    def test_remote_hash_without_hashsum_support(self, test_settings, mocker):
+    def test_remote_hash_ignores_interleaved_log_lines(self, test_settings, rclone_mocks):
+        """Test remote_hash skips rclone log output mixed into the hashsum stream."""
+        hashsum_output = (
+            "2024/01/01 12:00:00 NOTICE : some rclone notice\n"
+            "abc123  path/to/file1.eml\n"
+            "def456  path/to/file2.eml"
+        )
+        rclone_mocks.hashsum.side_effect = _fake_hashsum(hashsum_output, ok=True)
+
+        result = remote_hash(test_settings, "*.eml", silent_logging=True)
+        assert result == {"path/to/file1.eml": "abc123", "path/to/file2.eml": "def456"}
+
+    def test_remote_hash_keys_relative_to_remote_root(self, test_settings, rclone_mocks):
+        """Hashsum keys for a subfolder carry the same prefix as the streaming fallback."""
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("abc123  email.eml\n")
+
+        result = remote_hash(test_settings, "email.eml", remote_path=f"{test_settings.remote}/2024/folder")
+        assert result == {"/2024/folder/email.eml": "abc123"}
+
+    def test_remote_hash_downloads_in_one_call_without_server_hashes(self, test_settings, mocker, rclone_mocks):
+        """Without server-side SHA256, one hashsum --download call replaces lsjson plus per-file cat."""
+        server = _fake_hashsum("", ok=False)
+        download = _fake_hashsum("abc123  2024/a/email.eml\ndef456  2024/b/email.eml\n")
+        rclone_mocks.hashsum.side_effect = lambda *args, **kwargs: (download if "--download" in args else server)(*args, **kwargs)
+        mock_compute = mocker.patch("mailbackup.utils.compute_remote_sha256")
+
+        result = remote_hash(test_settings, "**/email.eml", silent_logging=True)
+
+        assert result == {"2024/a/email.eml": "abc123", "2024/b/email.eml": "def456"}
+        assert rclone_mocks.hashsum.call_count == 2
+        rclone_mocks.lsjson.assert_not_called()
+        mock_compute.assert_not_called()
+
+    def test_remote_hash_without_hashsum_support(self, test_settings, mocker, rclone_mocks):
         """Test remote_hash fallback when hashsum not supported."""
         # Mock failed hashsum
-        mocker.patch("mailbackup.utils.rclone_hashsum", return_value=Mock(
-            returncode=1,
-            stdout=""
-        ))
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("", ok=False)
 
         # Mock lsjson to return file list
         lsjson_output = json.dumps([
             {"Path": "file1.eml"},
             {"Path": "file2.eml"},
         ])
-        mocker.patch("mailbackup.utils.rclone_lsjson", return_value=Mock(
+        rclone_mocks.lsjson.return_value = Mock(
             returncode=0,
             stdout=lsjson_output
-        ))
+        )
 
         # Mock compute_remote_sha256
         def mock_compute(settings, path):
@@ -183,37 +267,46 @@ class TestRemoteHashIntegration:
         assert result["file1.eml"] == "hash_file1.eml"
         assert result["file2.eml"] == "hash_file2.eml"
 
-    def test_remote_hash_lsjson_fails(self, test_settings, mocker):
+    def test_remote_hash_fallback_hashes_files_only(self, test_settings, mocker, rclone_mocks):
+        """Directory entries from lsjson are never handed to the hash workers."""
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("", ok=False)
+        rclone_mocks.lsjson.return_value = Mock(
+            returncode=0,
+            stdout=json.dumps([{"Path": "2024", "IsDir": True}, {"Path": "2024/email.eml", "IsDir": False}]),
+        )
+        mock_compute = mocker.patch("mailbackup.utils.compute_remote_sha256", return_value="hash123")
+
+        result = remote_hash(test_settings, "*.eml", silent_logging=True)
+
+        assert result == {"2024/email.eml": "hash123"}
+        mock_compute.assert_called_once_with(test_settings, "2024/email.eml")
+        assert "--files-only" in rclone_mocks.lsjson.call_args.args
+
+    def test_remote_hash_lsjson_fails(self, test_settings, rclone_mocks):
         """Test remote_hash when lsjson fails."""
         # Mock failed hashsum
-        mocker.patch("mailbackup.utils.rclone_hashsum", return_value=Mock(
-            returncode=1,
-            stdout=""
-        ))
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("", ok=False)
 
         # Mock failed lsjson
-        mocker.patch("mailbackup.utils.rclone_lsjson", return_value=Mock(
+        rclone_mocks.lsjson.return_value = Mock(
             returncode=1,
             stdout=""
-        ))
+        )
 
         result = remote_hash(test_settings, "*.eml", silent_logging=True)
         assert result is None
 
-    def test_remote_hash_empty_hashsum(self, test_settings, mocker):
+    def test_remote_hash_empty_hashsum(self, test_settings, mocker, rclone_mocks):
         """Test remote_hash when hashsum returns no results."""
         # Mock successful hashsum but empty results
-        mocker.patch("mailbackup.utils.rclone_hashsum", return_value=Mock(
-            returncode=0,
-            stdout=""
-        ))
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("", ok=True)
 
         # Should fallback to lsjson
         lsjson_output = json.dumps([{"Path": "file1.eml"}])
-        mocker.patch("mailbackup.utils.rclone_lsjson", return_value=Mock(
+        rclone_mocks.lsjson.return_value = Mock(
             returncode=0,
             stdout=lsjson_output
-        ))
+        )
 
         mocker.patch("mailbackup.utils.compute_remote_sha256", return_value="hash123")
 
@@ -221,20 +314,17 @@ class TestRemoteHashIntegration:
         assert result is not None
         assert len(result) == 1
 
-    def test_remote_hash_compute_failure(self, test_settings, mocker):
+    def test_remote_hash_compute_failure(self, test_settings, mocker, rclone_mocks):
         """Test remote_hash when compute_remote_sha256 raises exception."""
         # Mock failed hashsum
-        mocker.patch("mailbackup.utils.rclone_hashsum", return_value=Mock(
-            returncode=1,
-            stdout=""
-        ))
+        rclone_mocks.hashsum.side_effect = _fake_hashsum("", ok=False)
 
         # Mock lsjson
         lsjson_output = json.dumps([{"Path": "file1.eml"}, {"Path": "file2.eml"}])
-        mocker.patch("mailbackup.utils.rclone_lsjson", return_value=Mock(
+        rclone_mocks.lsjson.return_value = Mock(
             returncode=0,
             stdout=lsjson_output
-        ))
+        )
 
         # Mock compute_remote_sha256 to fail for one file
         def mock_compute(settings, path):
@@ -300,11 +390,18 @@ class TestUtilityFunctionsIntegration:
         def test_handler(signum, frame):
             handler_called.append(signum)
 
-        install_signal_handlers(test_handler)
+        previous = {signum: signal.getsignal(signum) for signum in INTERRUPT_SIGNALS}
+        try:
+            install_signal_handlers(test_handler)
 
-        # Verify handlers are installed by checking signal.getsignal
-        assert signal.getsignal(signal.SIGINT) == test_handler
-        assert signal.getsignal(signal.SIGTERM) == test_handler
+            # Verify handlers are installed by checking signal.getsignal
+            assert signal.getsignal(signal.SIGINT) == test_handler
+            assert signal.getsignal(signal.SIGTERM) == test_handler
+            if hasattr(signal, "SIGHUP"):
+                assert signal.getsignal(signal.SIGHUP) == test_handler
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
 
 
 @pytest.mark.integration
@@ -329,8 +426,8 @@ class TestStatusThreadIntegration:
         # Wait a moment for thread to run
         time.sleep(0.1)
 
+        # stop() wakes the reporter and joins it, so no further waiting is needed
         thread.stop()
-        time.sleep(0.5)
 
         # Thread should be stopped
         assert not thread._thread.is_alive()
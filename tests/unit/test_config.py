@@ -3,7 +3,11 @@
 Unit tests for config.py module.
 """
 
+import subprocess
+import sys
+
 import pytest
+from dataclasses import fields
 from pathlib import Path
 from mailbackup.config import (
     Settings,
@@ -12,6 +16,7 @@ from mailbackup.config import (
     _load_ini,
     _coerce_bool,
     _coerce_int,
+    _FIELD_SPEC,
 )
 
 
@@ -24,6 +29,8 @@ class TestCoerceFunctions:
         assert _coerce_bool("TRUE", False) is True
         assert _coerce_bool("yes", False) is True
         assert _coerce_bool("on", False) is True
+        assert _coerce_bool(" Y ", False) is True
+        assert _coerce_bool("t", False) is True
         assert _coerce_bool(True, False) is True
     
     def test_coerce_bool_false_values(self):
@@ -32,6 +39,8 @@ class TestCoerceFunctions:
         assert _coerce_bool("FALSE", True) is False
         assert _coerce_bool("no", True) is False
         assert _coerce_bool("off", True) is False
+        assert _coerce_bool("n", True) is False
+        assert _coerce_bool("F", True) is False
         assert _coerce_bool(False, True) is False
     
     def test_coerce_bool_none_returns_default(self):
@@ -77,6 +86,7 @@ class TestSettings:
             max_hash_threads=8,
             max_upload_workers=4,
             max_extract_workers=1,
+            extract_processes=0,
             upload_batch_size=100,
             status_interval=300,
             log_level="INFO",
@@ -112,6 +122,7 @@ class TestSettings:
             max_hash_threads=8,
             max_upload_workers=4,
             max_extract_workers=1,
+            extract_processes=0,
             upload_batch_size=100,
             status_interval=300,
             log_level="INFO",
@@ -126,6 +137,13 @@ class TestSettings:
         
         assert settings.manifest_remote_path == "nextcloud:Backups/Email/manifest.csv"
 
+    def test_settings_rejects_unknown_attributes(self, test_settings):
+        # Slotted: fields stay assignable, but a misspelt attribute is an error instead of a silent no-op
+        test_settings.retention_years = 5
+        assert test_settings.retention_years == 5
+        with pytest.raises(AttributeError):
+            test_settings.retention_year = 5
+
 
 class TestLoadToml:
     """Tests for TOML configuration loading."""
@@ -141,16 +159,10 @@ remote = "nextcloud:Backups/Email"
 retention_years = 3
 """)
         
-        try:
-            data = _load_toml(toml_file)
-            assert "paths" in data
-            assert data["paths"]["maildir"] == "/srv/maildir"
-            assert data["rotation"]["retention_years"] == 3
-        except RuntimeError as e:
-            # If no TOML library available, skip test
-            if "no TOML parser available" in str(e):
-                pytest.skip("TOML parser not available")
-            raise
+        data = _load_toml(toml_file)
+        assert "paths" in data
+        assert data["paths"]["maildir"] == "/srv/maildir"
+        assert data["rotation"]["retention_years"] == 3
     
     def test_load_toml_missing_file(self, tmp_path):
         toml_file = tmp_path / "nonexistent.toml"
@@ -184,6 +196,11 @@ key = value
         with pytest.raises(RuntimeError, match="must have a .* section"):
             _load_ini(ini_file)
 
+    def test_configparser_only_imported_for_ini(self):
+        code = "import sys, mailbackup.config; print('configparser' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "False"
+
 
 class TestLoadSettings:
     """Tests for load_settings function."""
@@ -253,6 +270,28 @@ attachments_dir = /custom/attachments
         assert settings.maildir == Path("/custom/maildir")
         assert settings.attachments_dir == Path("/custom/attachments")
 
+    def test_field_spec_covers_every_setting(self):
+        assert {spec[0] for spec in _FIELD_SPEC} == {f.name for f in fields(Settings)}
+
+    def test_load_settings_nested_sections_and_aliases(self, tmp_path):
+        toml_file = tmp_path / "mailbackup.toml"
+        toml_file.write_text("""
+[paths]
+remote = "remote:Backups/Email/"
+
+[performance]
+max_hash_workers = 3
+
+[integrity]
+verify_integrity = "no"
+""")
+
+        settings = load_settings(toml_file)
+        assert settings.remote == "remote:Backups/Email"
+        assert settings.max_hash_threads == 3
+        assert settings.verify_integrity is False
+        assert settings.fetch_command == "mbsync -V -a"
+
 
 class TestConfigEdgeCases:
     """Tests for config loading edge cases."""
@@ -5,18 +5,31 @@ Unit tests for db.py module.
 
 import sqlite3
 
+import pytest
+
 from mailbackup.db import (
     ensure_schema,
     fetch_unsynced,
     mark_synced,
     fetch_synced,
+    count_synced,
     mark_archived_year,
     is_processed,
     mark_processed,
+    mark_processed_many,
+    fetch_processed_hashes,
+    ProcessedBatch,
     get_candidate_rotation_years,
     fetch_unarchived_paths_for_year,
     update_remote_path,
+    update_remote_paths,
+    RemotePathBatch,
+    lookup_file_hash,
+    store_file_hashes,
+    prune_file_hashes,
+    FileHashBatch,
     get_connection,
+    FETCH_UNSYNCED_SQL,
 )
 
 
@@ -151,6 +164,22 @@ class TestMarkProcessed:
         assert row["path"] == "/new/path.eml"
         assert row["from_header"] == "new@example.com"
 
+    def test_mark_processed_updates_in_place(self, test_db):
+        """Re-processing a message keeps its row id and sync state (upsert, not delete + insert)."""
+        mark_processed(test_db, "hash123", "/old.eml", "a@b.c", "Old", "2024-01-15 10:30:00", [], False)
+        mark_synced(test_db, "hash123", "sha", "remote/old.eml")
+        cur = get_connection(test_db).cursor()
+        cur.execute("SELECT id FROM processed WHERE hash = ?;", ("hash123",))
+        row_id = cur.fetchone()["id"]
+
+        mark_processed(test_db, "hash123", "/new.eml", "a@b.c", "New", "2024-01-15 10:30:00", [], False)
+
+        cur.execute("SELECT id, synced_at, remote_path FROM processed WHERE hash = ?;", ("hash123",))
+        row = cur.fetchone()
+        assert row["id"] == row_id
+        assert row["synced_at"] is not None
+        assert row["remote_path"] == "remote/old.eml"
+
     def test_mark_processed_spam_flag(self, test_db):
         mark_processed(
             test_db, "spamhash", "/spam.eml", "spammer@example.com",
@@ -165,6 +194,97 @@ class TestMarkProcessed:
         assert row["spam"] == 1
 
 
+class TestMarkProcessedMany:
+    """Tests for mark_processed_many and ProcessedBatch."""
+
+    @staticmethod
+    def _subjects(db_path):
+        cur = get_connection(db_path).cursor()
+        cur.execute("SELECT hash, subject FROM processed ORDER BY hash;")
+        return [tuple(r) for r in cur.fetchall()]
+
+    def test_mark_processed_many_upserts(self, test_db):
+        mark_processed(test_db, "hash1", "/1.eml", "a@b.c", "Old", "2024-01-15 10:30:00", [], False)
+
+        mark_processed_many(test_db, [
+            ("hash1", "/1.eml", "a@b.c", "New", "2024-01-15 10:30:00", [], False),
+            ("hash2", "/2.eml", "a@b.c", "Two", "2024-01-15 10:30:00", ["/att.pdf"], True),
+            ("", "/skipped.eml", "a@b.c", "Skipped", "2024-01-15 10:30:00", [], False),
+        ])
+
+        assert self._subjects(test_db) == [("hash1", "New"), ("hash2", "Two")]
+
+    def test_processed_batch_flushes_on_exit(self, test_db):
+        with ProcessedBatch(test_db) as batch:
+            batch.add("hash1", "/1.eml", "a@b.c", "One", "2024-01-15 10:30:00", [], False)
+            assert "hash1" in batch
+            # Nothing written until the batch is flushed
+            assert not is_processed(test_db, "hash1")
+
+        assert is_processed(test_db, "hash1")
+        assert "hash1" in batch
+
+    def test_processed_batch_knows_existing_fingerprints(self, test_db, mocker):
+        mark_processed(test_db, "hash1", "/1.eml", "a@b.c", "One", "2024-01-15 10:30:00", [], False)
+        spy = mocker.patch("mailbackup.db.fetch_processed_hashes", side_effect=fetch_processed_hashes)
+
+        batch = ProcessedBatch(test_db)
+        batch.add("hash2", "/2.eml", "a@b.c", "Two", "2024-01-15 10:30:00", [], False)
+
+        assert "hash1" in batch
+        assert "hash2" in batch
+        assert "hash3" not in batch
+        batch.add("hash3", "/3.eml", "a@b.c", "Three", "2024-01-15 10:30:00", [], False)
+        assert "hash3" in batch
+        # The DB is read once, not per lookup
+        spy.assert_called_once_with(test_db)
+
+    def test_processed_batch_flushes_when_full(self, test_db, mocker):
+        spy = mocker.patch("mailbackup.db.mark_processed_many")
+        record = ("hash1", "/1.eml", "a@b.c", "One", "2024-01-15 10:30:00", [], False)
+
+        batch = ProcessedBatch(test_db, batch_size=2)
+        batch.add(*record)
+        spy.assert_not_called()
+        batch.add(*record)
+        spy.assert_called_once_with(test_db, [record, record])
+
+        batch.flush()
+        spy.assert_called_once()
+
+
+class TestFileHashCache:
+    """Tests for the file hash cache helpers and FileHashBatch."""
+
+    def test_lookup_requires_matching_size_and_mtime(self, test_db):
+        store_file_hashes(test_db, [("/m/1.eml", 10, 1000, "hash1")])
+
+        assert lookup_file_hash(test_db, "/m/1.eml", 10, 1000) == "hash1"
+        assert lookup_file_hash(test_db, "/m/1.eml", 11, 1000) is None
+        assert lookup_file_hash(test_db, "/m/1.eml", 10, 2000) is None
+        assert lookup_file_hash(test_db, "/m/2.eml", 10, 1000) is None
+
+    def test_store_overwrites_changed_file(self, test_db):
+        store_file_hashes(test_db, [("/m/1.eml", 10, 1000, "old")])
+        store_file_hashes(test_db, [("/m/1.eml", 12, 3000, "new")])
+
+        assert lookup_file_hash(test_db, "/m/1.eml", 12, 3000) == "new"
+
+    def test_prune_drops_paths_not_kept(self, test_db):
+        store_file_hashes(test_db, [("/m/1.eml", 1, 1, "h1"), ("/m/2.eml", 2, 2, "h2")])
+
+        assert prune_file_hashes(test_db, ["/m/2.eml"]) == 1
+        assert lookup_file_hash(test_db, "/m/1.eml", 1, 1) is None
+        assert lookup_file_hash(test_db, "/m/2.eml", 2, 2) == "h2"
+
+    def test_file_hash_batch_flushes_on_exit(self, test_db):
+        with FileHashBatch(test_db) as hashes:
+            hashes.add("/m/1.eml", 10, 1000, "hash1")
+            assert lookup_file_hash(test_db, "/m/1.eml", 10, 1000) is None
+
+        assert lookup_file_hash(test_db, "/m/1.eml", 10, 1000) == "hash1"
+
+
 class TestFetchUnsynced:
     """Tests for fetch_unsynced function."""
 
@@ -200,6 +320,15 @@ class TestFetchUnsynced:
 
         assert "spam1" not in hashes
 
+    def test_fetch_unsynced_avoids_table_scan(self, test_db):
+        """The unsynced filter is served by idx_processed_synced_at rather than a full scan."""
+        cur = get_connection(test_db).cursor()
+        cur.execute("EXPLAIN QUERY PLAN " + FETCH_UNSYNCED_SQL)
+        plan = [row[3] for row in cur.fetchall()]
+
+        assert any("idx_processed_synced_at" in step for step in plan)
+        assert "SCAN processed" not in plan
+
 
 class TestMarkSynced:
     """Tests for mark_synced function."""
@@ -250,6 +379,39 @@ class TestFetchSynced:
         assert "synced1" in hashes
         assert "unsynced1" not in hashes
 
+    def test_fetch_synced_is_lazy(self, test_db):
+        mark_processed(
+            test_db, "synced1", "/path1.eml", "test@example.com",
+            "Synced", "2024-01-15 10:30:00", [], False
+        )
+        mark_synced(test_db, "synced1", "sha256", "remote/path")
+
+        results = fetch_synced(test_db)
+
+        assert not isinstance(results, list)
+        assert [row["hash"] for row in results] == ["synced1"]
+
+    def test_fetch_synced_spans_fetch_chunks(self, test_db, monkeypatch):
+        monkeypatch.setattr("mailbackup.db.FETCH_CHUNK_SIZE", 2)
+        mark_processed_many(test_db, [
+            (f"synced{i}", f"/path{i}.eml", "test@example.com", "Synced", "2024-01-15 10:30:00", [], False)
+            for i in range(5)
+        ])
+        for i in range(5):
+            mark_synced(test_db, f"synced{i}", "sha256", f"remote/{i}")
+
+        assert sorted(row["hash"] for row in fetch_synced(test_db)) == [f"synced{i}" for i in range(5)]
+
+    def test_count_synced_matches_fetch_synced(self, test_db):
+        mark_processed_many(test_db, [
+            (f"hash{i}", f"/path{i}.eml", "test@example.com", "Subject", "2024-01-15 10:30:00", [], False)
+            for i in range(3)
+        ])
+        mark_synced(test_db, "hash0", "sha256", "remote/0")
+        mark_synced(test_db, "hash2", "sha256", "remote/2")
+
+        assert count_synced(test_db) == 2 == len(list(fetch_synced(test_db)))
+
 
 class TestMarkArchivedYear:
     """Tests for mark_archived_year function."""
@@ -283,17 +445,34 @@ class TestMarkArchivedYear:
         assert archived_2023 is not None
         assert archived_2024 is None
 
+    def test_mark_archived_year_splits_on_utc_year_boundary(self, test_db):
+        # The extractor stores UTC ISO timestamps; the last and first second of a year land on opposite sides
+        mark_processed_many(test_db, [
+            ("late2023", "/a.eml", "a@b.c", "A", "2023-12-31T23:59:59+00:00", [], False),
+            ("early2024", "/b.eml", "a@b.c", "B", "2024-01-01T00:00:00+00:00", [], False),
+            ("unsynced2023", "/c.eml", "a@b.c", "C", "2023-03-01T12:00:00+00:00", [], False),
+        ])
+        mark_synced(test_db, "late2023", "sha1", "remote/a")
+        mark_synced(test_db, "early2024", "sha2", "remote/b")
+
+        mark_archived_year(test_db, 2023)
+
+        cur = get_connection(test_db).cursor()
+        cur.execute("SELECT hash FROM processed WHERE archived_at IS NOT NULL;")
+        assert [r["hash"] for r in cur.fetchall()] == ["late2023"]
+
 
 class TestGetCandidateRotationYears:
     """Tests for get_candidate_rotation_years function."""
 
     def test_get_candidate_rotation_years(self, test_db):
         # Add emails from various years
-        for year in [2020, 2021, 2022, 2023, 2024]:
-            mark_processed(
-                test_db, f"email{year}", f"/{year}.eml", "test@example.com",
-                f"{year} Email", f"{year}-06-15 10:30:00", [], False
-            )
+        all_years = [2020, 2021, 2022, 2023, 2024]
+        mark_processed_many(test_db, [
+            (f"email{year}", f"/{year}.eml", "test@example.com", f"{year} Email", f"{year}-06-15 10:30:00", [], False)
+            for year in all_years
+        ])
+        for year in all_years:
             mark_synced(test_db, f"email{year}", f"sha{year}", f"remote/{year}")
 
         # Get years <= 2022
@@ -310,25 +489,14 @@ class TestFetchUnarchivedPathsForYear:
     """Tests for fetch_unarchived_paths_for_year function."""
 
     def test_fetch_unarchived_paths_for_year(self, test_db):
-        # Add synced but unarchived emails for 2023
-        mark_processed(
-            test_db, "hash1", "/path1.eml", "test@example.com",
-            "Email 1", "2023-01-15 10:30:00", [], False
-        )
-        mark_synced(test_db, "hash1", "sha1", "remote/1")
-
-        mark_processed(
-            test_db, "hash2", "/path2.eml", "test@example.com",
-            "Email 2", "2023-06-15 10:30:00", [], False
-        )
-        mark_synced(test_db, "hash2", "sha2", "remote/2")
-
-        # Add archived email for 2023
-        mark_processed(
-            test_db, "hash3", "/path3.eml", "test@example.com",
-            "Email 3", "2023-12-15 10:30:00", [], False
-        )
-        mark_synced(test_db, "hash3", "sha3", "remote/3")
+        # Add synced emails for 2023, then archive the year
+        mark_processed_many(test_db, [
+            ("hash1", "/path1.eml", "test@example.com", "Email 1", "2023-01-15 10:30:00", [], False),
+            ("hash2", "/path2.eml", "test@example.com", "Email 2", "2023-06-15 10:30:00", [], False),
+            ("hash3", "/path3.eml", "test@example.com", "Email 3", "2023-12-15 10:30:00", [], False),
+        ])
+        for i in (1, 2, 3):
+            mark_synced(test_db, f"hash{i}", f"sha{i}", f"remote/{i}")
         mark_archived_year(test_db, 2023)
 
         # Fetch unarchived
@@ -365,6 +533,53 @@ class TestUpdateRemotePath:
         update_remote_path(test_db, None, "path")
 
 
+class TestUpdateRemotePaths:
+    """Tests for update_remote_paths and RemotePathBatch."""
+
+    @staticmethod
+    def _remote_path(db_path, hash_val):
+        cur = get_connection(db_path).cursor()
+        cur.execute("SELECT remote_path FROM processed WHERE hash = ?;", (hash_val,))
+        return cur.fetchone()["remote_path"]
+
+    def test_update_remote_paths(self, test_db):
+        mark_processed_many(test_db, [
+            (h, f"/{h}.eml", "a@b.c", "Test", "2024-01-15 10:30:00", [], False) for h in ("hash1", "hash2")
+        ])
+
+        update_remote_paths(test_db, [("hash1", "r/1.eml"), ("hash2", "r/2.eml"), ("", "ignored")])
+
+        assert self._remote_path(test_db, "hash1") == "r/1.eml"
+        assert self._remote_path(test_db, "hash2") == "r/2.eml"
+
+    def test_update_remote_paths_empty(self, test_db):
+        # Should not crash
+        update_remote_paths(test_db, [])
+
+    def test_remote_path_batch_flushes_on_exit(self, test_db):
+        mark_processed(test_db, "hash1", "/p.eml", "a@b.c", "Test", "2024-01-15 10:30:00", [], False)
+
+        with RemotePathBatch(test_db) as batch:
+            batch.add("hash1", "r/1.eml")
+            batch.add(None, "ignored")
+            # Nothing written until the batch is flushed
+            assert self._remote_path(test_db, "hash1") is None
+
+        assert self._remote_path(test_db, "hash1") == "r/1.eml"
+
+    def test_remote_path_batch_flushes_when_full(self, test_db, mocker):
+        spy = mocker.patch("mailbackup.db.update_remote_paths")
+
+        batch = RemotePathBatch(test_db, batch_size=2)
+        batch.add("hash1", "r/1.eml")
+        spy.assert_not_called()
+        batch.add("hash2", "r/2.eml")
+        spy.assert_called_once_with(test_db, [("hash1", "r/1.eml"), ("hash2", "r/2.eml")])
+
+        batch.flush()
+        spy.assert_called_once()
+
+
 class TestDatabaseEdgeCases:
     """Tests for database edge cases."""
 
@@ -384,6 +599,32 @@ class TestDatabaseEdgeCases:
             # Or it may fail
             assert True
 
+    def test_connection_cached_until_closed(self, test_db):
+        """Test that get_connection reuses one handle per thread and reopens after close_all_connections."""
+        from mailbackup import db
+
+        conn = db.get_connection(test_db)
+        assert db.get_connection(test_db) is conn
+
+        db.close_all_connections()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1;")
+        reopened = db.get_connection(test_db)
+        assert reopened is not conn
+        assert reopened.execute("SELECT COUNT(*) FROM processed;").fetchone()[0] == 0
+
+    def test_connection_pragmas(self, test_db):
+        """Test that new connections run in WAL mode with an in-memory temp store and large cache."""
+        from mailbackup import db
+
+        conn = db.get_connection(test_db)
+
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store;").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA cache_size;").fetchone()[0] == -db.CACHE_SIZE_KIB
+
     def test_mark_synced_with_none_values(self, test_db):
         """Test mark_synced with None values."""
         from mailbackup import db
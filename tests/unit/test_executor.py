@@ -128,8 +128,29 @@ class TestManagedThreadPoolExecutor:
 
         assert len(results) == 5
         assert all(r.success for r in results)
-        # Results may not be in order due to concurrency
-        assert sorted([r.result for r in results]) == [1, 4, 9, 16, 25]
+        assert [r.result for r in results] == [1, 4, 9, 16, 25]
+
+    def test_map_keeps_input_order_when_tasks_finish_out_of_order(self):
+        """Test that results follow the input order while completion callbacks follow finish order."""
+        second_reported = threading.Event()
+        completed = []
+
+        def work(x):
+            if x == 1:
+                # The first task only finishes after the second one has been reported
+                assert second_reported.wait(timeout=5)
+            return x
+
+        def on_complete(result):
+            completed.append(result.item)
+            if result.item == 2:
+                second_reported.set()
+
+        with ManagedThreadPoolExecutor(max_workers=2, name="Test") as executor:
+            results = executor.map(work, [1, 2], on_complete)
+
+        assert completed == [2, 1]
+        assert [r.item for r in results] == [1, 2]
 
     def test_map_empty_items(self):
         """Test mapping with empty items."""
@@ -3,6 +3,8 @@
 Unit tests for extractor.py module.
 """
 
+import base64
+import os
 from email import message_from_bytes
 from pathlib import Path
 from mailbackup.statistics import create_stats
@@ -12,9 +14,14 @@ from mailbackup.extractor import (
     decode_mime_header,
     decode_text_part,
     save_attachment,
+    write_attachment,
     detect_spam,
+    extract_message,
+    parse_fast,
+    read_header_block,
     process_email_file,
     count_mail_files,
+    iter_mail_files,
 )
 
 
@@ -39,6 +46,15 @@ class TestDecodeMimeHeader:
         result = decode_mime_header(header)
         assert "Test Subject" in result or isinstance(result, str)
 
+    @pytest.mark.parametrize("header", ["Simple Header", "a\n b", "  lead  trail ", "Re: [list] a, b; c"])
+    def test_decode_plain_ascii_header_skips_decoder(self, header, mocker):
+        from email.header import decode_header, make_header
+
+        spy = mocker.patch("mailbackup.extractor.decode_header", side_effect=decode_header)
+
+        assert decode_mime_header(header) == str(make_header(decode_header(header)))
+        spy.assert_not_called()
+
 
 class TestDecodeTextPart:
     """Tests for decode_text_part function."""
@@ -53,6 +69,13 @@ Hello World
                 result = decode_text_part(part)
                 assert "Hello World" in result
 
+    @pytest.mark.parametrize("charset", ["x-unknown-charset", "base64"])
+    def test_decode_text_part_unusable_charset_falls_back_to_utf8(self, charset):
+        msg = message_from_bytes(
+            f"Content-Type: text/plain; charset={charset}\n\nGr\u00fc\u00dfe\n".encode("utf-8")
+        )
+        assert decode_text_part(msg) == "Gr\u00fc\u00dfe\n"
+
     def test_decode_text_part_no_payload(self):
         msg = message_from_bytes(b"""Content-Type: text/plain
 
@@ -97,6 +120,57 @@ dGVzdCBkYXRh
                 assert Path(result).exists()
 
 
+class TestSaveAttachmentBase64:
+    """Tests for the chunked base64 path of save_attachment."""
+
+    @staticmethod
+    def _part(body: bytes):
+        msg = message_from_bytes(b"""Content-Type: application/octet-stream
+Content-Disposition: attachment; filename="blob.bin"
+Content-Transfer-Encoding: base64
+
+""" + body)
+        return next(p for p in msg.walk() if p.get_content_disposition() == "attachment")
+
+    def test_chunked_decode_matches_stdlib(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("mailbackup.extractor._BASE64_CHUNK_CHARS", 100)
+        data = os.urandom(10_000)
+        part = self._part(base64.encodebytes(data))
+
+        result = save_attachment(part, tmp_path)
+
+        assert Path(result).read_bytes() == data == part.get_payload(decode=True)
+
+    def test_misaligned_lines_fall_back_to_stdlib_decoder(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("mailbackup.extractor._BASE64_CHUNK_CHARS", 4)
+        encoded = base64.b64encode(b"some attachment data").decode()
+        # 5-character lines do not fall on 4-character base64 quanta
+        body = "\n".join(encoded[i:i + 5] for i in range(0, len(encoded), 5)).encode()
+        part = self._part(body)
+
+        result = save_attachment(part, tmp_path)
+
+        assert Path(result).read_bytes() == b"some attachment data"
+        assert [p.name for p in tmp_path.iterdir()] == ["blob.bin"]
+
+    def test_identical_attachment_is_reused(self, tmp_path):
+        data = os.urandom(1000)
+        first = save_attachment(self._part(base64.encodebytes(data)), tmp_path)
+
+        again = save_attachment(self._part(base64.encodebytes(data)), tmp_path)
+        other = save_attachment(self._part(base64.encodebytes(data[:-1] + b"x")), tmp_path)
+
+        assert again == first
+        assert Path(other).name == "blob-1.bin"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["blob-1.bin", "blob.bin"]
+
+    def test_identical_decoded_attachment_is_reused(self, tmp_path):
+        first = write_attachment("doc.txt", b"same bytes", tmp_path)
+
+        assert write_attachment("doc.txt", b"same bytes", tmp_path) == first
+        assert Path(write_attachment("doc.txt", b"same bytez", tmp_path)).name == "doc-1.txt"
+
+
 class TestDetectSpam:
     """Tests for detect_spam function."""
 
@@ -131,6 +205,28 @@ Body
         result = detect_spam(msg, "Normal Subject", Path("/maildir/INBOX/email.eml"))
         assert result is True
 
+    def test_detect_spam_by_status_header(self):
+        msg = message_from_bytes(b"""Subject: Normal Subject
+From: test@example.com
+X-Spam-Status: Yes, score=9.1
+
+Body
+""")
+        result = detect_spam(msg, "Normal Subject", Path("/maildir/INBOX/cur/email.eml"))
+        assert result is True
+
+    @pytest.mark.parametrize("subject, expected", [
+        ("[SPAM] offer", True),
+        ("***SPAM*** offer", True),
+        ("Junkyard sale", True),
+        ("Phishing awareness", True),
+        ("Spam filter settings", False),
+        ("Trash pickup schedule", False),
+    ])
+    def test_detect_spam_subject_markers(self, subject, expected):
+        msg = message_from_bytes(b"From: test@example.com\n\nBody\n")
+        assert detect_spam(msg, subject, Path("/maildir/INBOX/cur/email.eml")) is expected
+
     def test_not_spam(self):
         msg = message_from_bytes(b"""Subject: Normal Email
 From: test@example.com
@@ -172,6 +268,52 @@ class TestProcessEmailFile:
         result2 = process_email_file(email_file, attachments_dir, test_db, create_stats())
         assert result2 is True  # Duplicate detection returns True (success)
 
+    def test_process_email_file_with_batch_defers_db_write(self, tmp_path, test_db, sample_email):
+        from mailbackup import db
+
+        email_file = tmp_path / "test.eml"
+        email_file.write_bytes(sample_email)
+        copy_file = tmp_path / "copy.eml"
+        copy_file.write_bytes(sample_email)
+        attachments_dir = tmp_path / "attachments"
+
+        with db.ProcessedBatch(test_db) as batch:
+            assert process_email_file(email_file, attachments_dir, test_db, create_stats(), batch=batch) is True
+            # The identical copy is recognised from the pending batch, not re-extracted
+            assert process_email_file(copy_file, attachments_dir, test_db, create_stats(), batch=batch) is True
+            assert db.fetch_unsynced(test_db) == []
+
+        assert len(db.fetch_unsynced(test_db)) == 1
+        assert len(list(attachments_dir.rglob("body*.txt"))) == 1
+
+    def test_process_email_file_opens_message_once(self, tmp_path, test_db, sample_email, mocker):
+        import builtins
+
+        email_file = tmp_path / "test.eml"
+        email_file.write_bytes(sample_email)
+        open_spy = mocker.patch("builtins.open", side_effect=builtins.open)
+
+        assert process_email_file(email_file, tmp_path / "attachments", test_db, create_stats()) is True
+
+        # The handle used for the fingerprint is reused for parsing
+        assert [c for c in open_spy.call_args_list if c.args[0] == email_file] == [mocker.call(email_file, "rb")]
+
+    def test_process_email_file_reuses_cached_fingerprint(self, tmp_path, test_db, sample_email, mocker):
+        email_file = tmp_path / "test.eml"
+        email_file.write_bytes(sample_email)
+        attachments_dir = tmp_path / "attachments"
+        assert process_email_file(email_file, attachments_dir, test_db, create_stats()) is True
+
+        hash_spy = mocker.patch("mailbackup.extractor.sha256_fileobj")
+        assert process_email_file(email_file, attachments_dir, test_db, create_stats()) is True
+        hash_spy.assert_not_called()
+
+        # Changing the file invalidates the cached fingerprint
+        email_file.write_bytes(sample_email + b"changed\n")
+        hash_spy.side_effect = lambda f: "new-fingerprint"
+        assert process_email_file(email_file, attachments_dir, test_db, create_stats()) is True
+        hash_spy.assert_called_once()
+
     def test_process_email_file_with_attachment(self, tmp_path, test_db, sample_email_with_attachment):
         email_file = tmp_path / "attachment_email.eml"
         email_file.write_bytes(sample_email_with_attachment)
@@ -209,6 +351,95 @@ Click here to claim your prize!
         assert result is True
 
 
+class TestFastParser:
+    """Tests for the optional fast_mail_parser path."""
+
+    @pytest.fixture
+    def mixed_email(self):
+        return b"""From: =?utf-8?q?J=C3=B6rg?= <sender@example.com>
+Subject: =?utf-8?q?Gr=C3=BC=C3=9Fe?=
+Date: Mon, 1 Jan 2024 12:00:00 +0000
+MIME-Version: 1.0
+Content-Type: multipart/mixed; boundary="X"
+
+--X
+Content-Type: text/plain; charset=utf-8
+
+Body text
+--X
+Content-Type: image/png
+Content-Disposition: inline; filename="logo.png"
+
+PNG
+--X
+Content-Type: application/pdf
+Content-Disposition: attachment; filename="report.pdf"
+Content-Transfer-Encoding: base64
+
+JVBERi0xLjQK
+--X--
+"""
+
+    def _extract(self, tmp_path, test_db, raw, name):
+        email_file = tmp_path / f"{name}.eml"
+        email_file.write_bytes(raw)
+        attachments_dir = tmp_path / name
+        assert process_email_file(email_file, attachments_dir, test_db, create_stats()) is True
+        return {p.relative_to(attachments_dir).as_posix(): p.read_bytes()
+                for p in attachments_dir.rglob("*") if p.is_file()}
+
+    def test_fast_and_stdlib_paths_extract_same_files(self, tmp_path, test_db, mixed_email, monkeypatch):
+        pytest.importorskip("fast_mail_parser")
+        assert parse_fast(mixed_email) is not None
+        fast = self._extract(tmp_path, test_db, mixed_email, "fast")
+
+        monkeypatch.setattr("mailbackup.extractor.fast_mail_parser", None)
+        stdlib = self._extract(tmp_path, test_db, mixed_email.replace(b"Body text", b"Body text."), "stdlib")
+
+        assert sorted(fast) == sorted(stdlib)
+        assert any(name.endswith("report.pdf") for name in fast)
+        assert not any(name.endswith("logo.png") for name in fast)
+
+    def test_parse_fast_falls_back_on_repaired_charset(self):
+        pytest.importorskip("fast_mail_parser")
+        raw = b"From: a@example.com\nContent-Type: text/plain; charset=latin-1\n\nBody \xe4\n"
+        assert parse_fast(raw) is None
+
+    def test_parse_fast_without_module(self, monkeypatch):
+        monkeypatch.setattr("mailbackup.extractor.fast_mail_parser", None)
+        assert parse_fast(b"From: a@example.com\n\nBody\n") is None
+
+
+class TestExtractMessage:
+    """Tests for extract_message function."""
+
+    def test_spam_is_decided_from_headers_without_parsing_body(self, tmp_path, mocker):
+        eml = tmp_path / "spam.eml"
+        eml.write_bytes(b"From: spammer@example.com\nSubject: [SPAM] Offer\n\n" + b"x" * 100_000)
+        body_parsers = [
+            mocker.patch("mailbackup.extractor.parse_fast"),
+            mocker.patch("mailbackup.extractor._BODY_PARSER"),
+            mocker.patch("mailbackup.extractor.email.message_from_bytes"),
+        ]
+
+        result = extract_message(eml, tmp_path / "attachments")
+
+        assert result.spam is True
+        assert result.subject == "[SPAM] Offer"
+        assert result.saved_paths == []
+        for parser in body_parsers:
+            parser.assert_not_called()
+        assert not (tmp_path / "attachments").exists()
+
+    def test_read_header_block_stops_at_blank_line(self, tmp_path):
+        eml = tmp_path / "mail.eml"
+        eml.write_bytes(b"Subject: Hi\r\nFrom: a@example.com\r\n\r\nBody\r\n")
+
+        with open(eml, "rb") as f:
+            assert read_header_block(f) == b"Subject: Hi\r\nFrom: a@example.com\r\n\r\n"
+            assert f.read() == b"Body\r\n"
+
+
 class TestCountMailFiles:
     """Tests for count_mail_files function."""
 
@@ -228,6 +459,52 @@ class TestCountMailFiles:
         count = count_mail_files(sample_maildir)
         assert count == 0
 
+    def test_iter_mail_files_skips_tmp_and_hidden(self, sample_maildir):
+        account = sample_maildir / "account1"
+        for folder in ("INBOX/cur", "INBOX/new", "INBOX/tmp", ".Archive/cur", "Work/Sub/new"):
+            (account / folder).mkdir(parents=True)
+        (account / "INBOX" / "cur" / "a.eml").touch()
+        (account / "INBOX" / "cur" / ".hidden").touch()
+        (account / "INBOX" / "new" / "b.eml").touch()
+        (account / "INBOX" / "tmp" / "partial.eml").touch()
+        (account / ".Archive" / "cur" / "c.eml").touch()
+        (account / "Work" / "Sub" / "new" / "d.eml").touch()
+        (sample_maildir / ".hidden_account" / "INBOX" / "cur").mkdir(parents=True)
+        (sample_maildir / ".hidden_account" / "INBOX" / "cur" / "e.eml").touch()
+
+        found = sorted(p.name for p in iter_mail_files(sample_maildir))
+
+        assert found == ["a.eml", "b.eml", "c.eml", "d.eml"]
+        assert all(isinstance(p, Path) for p in iter_mail_files(sample_maildir))
+
+    def test_iter_mail_files_finds_user_folders_named_like_maildir_dirs(self, sample_maildir):
+        account = sample_maildir / "acct"
+        messages = {
+            "a": "cur", "b": "tmp/cur", "c": "new/cur",
+            "d": "Archive/tmp/cur", "e": ".Sent/cur", "f": "Arch/cur",
+        }
+        for name, folder in messages.items():
+            (account / folder).mkdir(parents=True, exist_ok=True)
+            (account / folder / name).touch()
+        (account / "tmp" / "spool.eml").touch()
+
+        found = sorted(p.name for p in iter_mail_files(sample_maildir))
+
+        assert found == sorted(messages)
+
+    def test_iter_mail_files_scans_each_folder_once(self, sample_maildir, mocker):
+        inbox = sample_maildir / "account1" / "INBOX"
+        (inbox / "cur").mkdir(parents=True)
+        (inbox / "new").mkdir()
+        (inbox / "cur" / "a.eml").touch()
+        spy = mocker.spy(os, "scandir")
+
+        assert [p.name for p in iter_mail_files(sample_maildir)] == ["a.eml"]
+
+        scanned = [Path(c.args[0]) for c in spy.call_args_list]
+        assert len(scanned) == len(set(scanned))
+        assert inbox / "cur" in scanned
+
     def test_count_mail_files_nonexistent(self, tmp_path):
         nonexistent = tmp_path / "nonexistent"
         count = count_mail_files(nonexistent)
@@ -3,6 +3,8 @@
 Unit tests for integrity.py module.
 """
 
+import json
+
 from mailbackup.integrity import rebuild_docset
 
 
@@ -86,3 +88,27 @@ class TestRebuildDocset:
         assert result.exists()
         # Should still create info.json
         assert (result / "info.json").exists()
+
+    def test_rebuild_docset_skips_missing_attachment(self, test_settings):
+        """Test that attachments missing on disk are left out of the docset."""
+        test_settings.maildir.mkdir(parents=True, exist_ok=True)
+        email_path = test_settings.maildir / "test.eml"
+        email_path.write_text("From: test@example.com\nSubject: Test\n\nBody")
+
+        row = {
+            "id": 1,
+            "hash": "abc123",
+            "path": str(email_path),
+            "from_header": "test@example.com",
+            "subject": "Test Email",
+            "date_header": "Mon, 1 Jan 2024 12:00:00 +0000",
+            "attachments": '["/nonexistent/missing.pdf"]',
+            "spam": 0,
+            "processed_at": "2024-01-01 12:00:00",
+        }
+
+        result = rebuild_docset(test_settings, 2024, "test_folder", row)
+
+        info = json.loads((result / "info.json").read_text())
+        assert info["attachments"] == []
+        assert sorted(p.name for p in result.iterdir()) == ["email.eml", "info.json"]
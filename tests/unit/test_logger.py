@@ -29,6 +29,7 @@ def create_test_settings(tmp_path, log_level="INFO"):
         max_hash_threads=2,
         max_upload_workers=2,
         max_extract_workers=1,
+        extract_processes=0,
         upload_batch_size=100,
         status_interval=10,
         log_level=log_level,
@@ -4,10 +4,12 @@ Unit tests for manifest.py module.
 """
 
 import json
+from pathlib import Path
 from unittest.mock import Mock
 
 from mailbackup.manifest import (
     load_manifest_csv,
+    parse_manifest_csv,
     _manifest_dict_to_lines,
     ManifestManager,
 )
@@ -60,6 +62,23 @@ class TestLoadManifestCsv:
         result = load_manifest_csv(manifest_path)
         assert result == {"path/to/file.eml": "abc123"}
 
+    def test_load_manifest_csv_crlf_and_no_trailing_newline(self, tmp_path):
+        """Test CRLF line endings and a final line without newline."""
+        manifest_path = tmp_path / "manifest.csv"
+        manifest_path.write_bytes(b"abc123,path/a.eml\r\ndef456,path/b,c.eml")
+
+        result = load_manifest_csv(manifest_path)
+        assert result == {"path/a.eml": "abc123", "path/b,c.eml": "def456"}
+
+
+class TestParseManifestCsv:
+    """Tests for parse_manifest_csv function."""
+
+    def test_parse_manifest_csv_line_endings(self):
+        """Test that LF, CRLF and bare CR line endings all split lines, as text mode would."""
+        result = parse_manifest_csv(b"a1,x.eml\nb2,y.eml\r\nc3,z.eml\rd4,w.eml")
+        assert result == {"x.eml": "a1", "y.eml": "b2", "z.eml": "c3", "w.eml": "d4"}
+
 
 class TestManifestDictToLines:
     """Tests for _manifest_dict_to_lines function."""
@@ -89,6 +108,19 @@ class TestManifestDictToLines:
         ]
 
 
+class TestFakeManifestShape:
+    """Keeps the conftest FakeManifest in sync with the real ManifestManager API."""
+
+    def test_fake_manifest_matches_manager_api(self, fake_manifest):
+        spec_mock = Mock(spec=ManifestManager)
+        public = [n for n in dir(ManifestManager) if not n.startswith("_")]
+
+        for name in public:
+            assert hasattr(spec_mock, name)
+            assert hasattr(fake_manifest, name), f"FakeManifest lacks {name}"
+        assert not hasattr(fake_manifest, "not_a_manifest_method")
+
+
 class TestManifestManager:
     """Tests for ManifestManager class."""
 
@@ -133,6 +165,26 @@ class TestManifestManager:
 
         mock_write.assert_called_once()
 
+    def test_queue_entries_persists_once(self, test_settings, mocker):
+        """Test that a batch of entries is queued and persisted once."""
+        mock_write = mocker.patch("mailbackup.manifest.write_json_atomic")
+        manager = ManifestManager(test_settings)
+
+        manager.queue_entries([("path1.eml", "hash1"), ("path2.eml", "hash2")])
+
+        assert manager._manifest_queue == {"path1.eml": "hash1", "path2.eml": "hash2"}
+        mock_write.assert_called_once()
+
+    def test_queue_entries_empty_is_noop(self, test_settings, mocker):
+        """Test that an empty batch does not touch the queue dump."""
+        mock_write = mocker.patch("mailbackup.manifest.write_json_atomic")
+        manager = ManifestManager(test_settings)
+
+        manager.queue_entries([])
+
+        assert manager._manifest_queue == {}
+        mock_write.assert_not_called()
+
     def test_dump_queue_empty(self, test_settings, mocker):
         """Test dumping empty queue."""
         mock_write = mocker.patch("mailbackup.manifest.write_json_atomic")
@@ -221,6 +273,26 @@ class TestManifestManager:
         # File should be removed after recovery
         assert not inprogress_file.exists()
 
+    def test_download_remote_manifest_reads_once(self, test_settings, mocker):
+        """Test that the downloaded manifest is read once for both its entries and its hash."""
+        import hashlib
+
+        content = b"abc123,2024/a/email.eml\n"
+        manager = ManifestManager(test_settings)
+
+        def fake_copyto(src, dst, **kwargs):
+            Path(dst).write_bytes(content)
+            return Mock(returncode=0)
+
+        mocker.patch("mailbackup.manifest.rclone_copyto", side_effect=fake_copyto)
+        load_spy = mocker.patch("mailbackup.manifest.load_manifest_csv")
+
+        entries, sha = manager._download_remote_manifest()
+
+        assert entries == {"2024/a/email.eml": "abc123"}
+        assert sha == hashlib.sha256(content).hexdigest()
+        load_spy.assert_not_called()
+
     def test_upload_manifest_if_needed_empty_queue(self, test_settings, mocker):
         """Test uploading manifest when queue is empty."""
         manager = ManifestManager(test_settings)
@@ -4,11 +4,9 @@ Unit tests for orchestrator.py module.
 """
 
 import subprocess
-from unittest.mock import Mock
 
 import pytest
 
-from mailbackup.manifest import ManifestManager
 from mailbackup.orchestrator import run_pipeline, _parse_command
 from mailbackup.statistics import create_stats
 
@@ -53,9 +51,9 @@ class TestRunPipeline:
         mocker.patch("mailbackup.orchestrator.get_logger", return_value=mock_logger)
         mocker.patch("mailbackup.statistics.get_logger", return_value=mock_logger)
 
-    def test_run_pipeline_fetch_only(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_fetch_only(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with fetch only."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_run_streaming = mocker.patch("mailbackup.orchestrator.run_streaming")
@@ -67,9 +65,9 @@ class TestRunPipeline:
         args = mock_run_streaming.call_args[0]
         assert "Fetching mail" in args[0]
 
-    def test_run_pipeline_process_only(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_process_only(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with process only."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_run_extractor = mocker.patch("mailbackup.orchestrator.run_extractor")
@@ -79,9 +77,9 @@ class TestRunPipeline:
         # Verify process was called
         mock_run_extractor.assert_called_once_with(test_settings, stats)
 
-    def test_run_pipeline_backup_stage(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_backup_stage(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with backup stage."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_upload = mocker.patch("mailbackup.orchestrator.incremental_upload")
@@ -91,9 +89,9 @@ class TestRunPipeline:
         # Verify backup was called
         mock_upload.assert_called_once_with(test_settings, manifest, stats)
 
-    def test_run_pipeline_archive_stage(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_archive_stage(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with archive stage."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_rotate = mocker.patch("mailbackup.orchestrator.rotate_archives")
@@ -103,9 +101,9 @@ class TestRunPipeline:
         # Verify archive was called
         mock_rotate.assert_called_once_with(test_settings, manifest, stats)
 
-    def test_run_pipeline_check_stage(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_check_stage(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with check stage."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_check = mocker.patch("mailbackup.orchestrator.integrity_check")
@@ -115,9 +113,9 @@ class TestRunPipeline:
         # Verify check was called
         mock_check.assert_called_once_with(test_settings, manifest, stats)
 
-    def test_run_pipeline_multiple_stages(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_multiple_stages(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with multiple stages."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_upload = mocker.patch("mailbackup.orchestrator.incremental_upload")
@@ -132,27 +130,27 @@ class TestRunPipeline:
         mock_rotate.assert_called_once()
         mock_check.assert_called_once()
 
-    def test_run_pipeline_unknown_stage(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_unknown_stage(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline with unknown stage logs warning."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Should not raise exception
         run_pipeline(test_settings, manifest, stats, fetch=False, process=False,
                      stages=["unknown_stage"])
 
-    def test_run_pipeline_fetch_no_command(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_fetch_no_command(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline fetch without fetch_command raises error."""
         test_settings.fetch_command = None
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         with pytest.raises(RuntimeError, match="fetch was requested but no fetch_command"):
             run_pipeline(test_settings, manifest, stats, fetch=True, process=False, stages=[])
 
-    def test_run_pipeline_fetch_command_failure(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_fetch_command_failure(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test pipeline handles fetch command failure."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_run_streaming = mocker.patch("mailbackup.orchestrator.run_streaming")
@@ -161,9 +159,9 @@ class TestRunPipeline:
         with pytest.raises(subprocess.CalledProcessError):
             run_pipeline(test_settings, manifest, stats, fetch=True, process=False, stages=[])
 
-    def test_run_pipeline_full_workflow(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_full_workflow(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test complete workflow: fetch + process + all stages."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_run_streaming = mocker.patch("mailbackup.orchestrator.run_streaming")
@@ -182,9 +180,9 @@ class TestRunPipeline:
         mock_rotate.assert_called_once()
         mock_check.assert_called_once()
 
-    def test_run_pipeline_process_exception_propagates(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_process_exception_propagates(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test that exceptions in process stage propagate."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         mock_run_extractor = mocker.patch("mailbackup.orchestrator.run_extractor")
@@ -193,9 +191,9 @@ class TestRunPipeline:
         with pytest.raises(Exception, match="Process failed"):
             run_pipeline(test_settings, manifest, stats, fetch=False, process=True, stages=[])
 
-    def test_run_pipeline_none_stages(self, test_settings, mocker, setup_mocks):
+    def test_run_pipeline_none_stages(self, test_settings, mocker, setup_mocks, fake_manifest):
         """Test that None stages defaults to empty list."""
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Should not raise exception
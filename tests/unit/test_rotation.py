@@ -9,7 +9,6 @@ from unittest.mock import Mock
 
 import pytest
 
-from mailbackup.manifest import ManifestManager
 from mailbackup.rotation import rotate_archives
 
 
@@ -29,18 +28,18 @@ class TestRotateArchives:
         mocker.patch("shutil.rmtree")
         return mocker
 
-    def test_rotate_archives_no_candidates(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_no_candidates(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test rotation with no candidate years."""
         mocker.patch("mailbackup.rotation.db.get_candidate_rotation_years", return_value=[])
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
 
         assert stats[StatKey.ARCHIVED] == 0
 
-    def test_rotate_archives_single_year(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_single_year(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test rotation with single year."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_year = current_year - test_settings.retention_years - 1
@@ -55,7 +54,7 @@ class TestRotateArchives:
         archive_file = archive_dir / f"emails_{old_year}.tar.zst"
         archive_file.write_bytes(b"archive content")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
@@ -63,7 +62,7 @@ class TestRotateArchives:
         # Rotation completed successfully if no exception raised
         assert True
 
-    def test_rotate_archives_multiple_years(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_multiple_years(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test rotation with multiple years."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_years = [current_year - test_settings.retention_years - i for i in range(1, 4)]
@@ -79,7 +78,7 @@ class TestRotateArchives:
             archive_file = archive_dir / f"emails_{year}.tar.zst"
             archive_file.write_bytes(b"archive content")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
@@ -88,7 +87,7 @@ class TestRotateArchives:
         # Rotation completed successfully if no exception raised
         assert True
 
-    def test_rotate_archives_skip_complete_year(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_skip_complete_year(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test rotation skips year when archive is complete."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_year = current_year - test_settings.retention_years - 1
@@ -98,7 +97,7 @@ class TestRotateArchives:
 
         mocker.patch("mailbackup.rotation.rclone_lsf", return_value=Mock(returncode=0))  # Archive exists
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
@@ -106,7 +105,7 @@ class TestRotateArchives:
         # Should skip year
         assert stats[StatKey.ARCHIVED] == 0
 
-    def test_rotate_archives_marks_archived(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_marks_archived(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test that rotation marks year as archived in DB."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_year = current_year - test_settings.retention_years - 1
@@ -123,14 +122,14 @@ class TestRotateArchives:
 
         mock_mark = mocker.patch("mailbackup.rotation.db.mark_archived_year")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
 
         mock_mark.assert_called()
 
-    def test_rotate_archives_queues_manifest(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_queues_manifest(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test that rotation queues archive in manifest."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_year = current_year - test_settings.retention_years - 1
@@ -145,14 +144,14 @@ class TestRotateArchives:
         archive_file = archive_dir / f"emails_{old_year}.tar.zst"
         archive_file.write_bytes(b"archive content")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         rotate_archives(test_settings, manifest, stats)
 
         manifest.queue_entry.assert_called()
 
-    def test_rotate_archives_handles_error_gracefully(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_handles_error_gracefully(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test that rotation handles errors gracefully and continues."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_years = [current_year - test_settings.retention_years - i for i in range(1, 3)]
@@ -178,13 +177,13 @@ class TestRotateArchives:
         archive_file = archive_dir / f"emails_{old_years[1]}.tar.zst"
         archive_file.write_bytes(b"archive content")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Should not raise exception
         rotate_archives(test_settings, manifest, stats)
 
-    def test_rotate_archives_with_existing_archive(self, test_settings, mocker, mock_rotation_deps):
+    def test_rotate_archives_with_existing_archive(self, test_settings, mocker, mock_rotation_deps, fake_manifest):
         """Test rotation merges with existing archive."""
         current_year = datetime.datetime.now(datetime.timezone.utc).year
         old_year = current_year - test_settings.retention_years - 1
@@ -203,7 +202,7 @@ class TestRotateArchives:
         archive_file = archive_dir / f"emails_{old_year}.tar.zst"
         archive_file.write_bytes(b"archive content")
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Archive download should be attempted
@@ -186,6 +186,25 @@ class TestStatusThread:
         # Should complete without errors
         assert True
 
+    def test_status_thread_exits_on_interrupt(self, mocker):
+        """An interrupt ends the reporter cleanly, without a final status line."""
+        from mailbackup.statistics import StatusThread
+
+        mocker.patch("mailbackup.statistics.get_global_interrupt_manager",
+                     return_value=mocker.Mock(is_interrupted=mocker.Mock(return_value=True)))
+        errors = []
+        mocker.patch.object(threading, "excepthook", side_effect=errors.append)
+
+        status_thread = StatusThread(interval=0.01, counters=create_stats())
+        status_logger = mocker.patch.object(status_thread, "logger")
+        status_thread.start()
+        status_thread._thread.join(timeout=2.0)
+
+        assert not status_thread._thread.is_alive()
+        assert errors == []
+        status_logger.status.assert_not_called()
+        status_logger.info.assert_not_called()
+
     def test_get_status_summary(self):
         """Test get_status_summary method."""
         from mailbackup.statistics import StatusThread
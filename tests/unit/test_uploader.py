@@ -1,29 +1,28 @@
 #!/usr/bin/env python3
-from mailbackup.statistics import create_stats, StatKey
 """
 Unit tests for uploader.py module.
 """
 
 from unittest.mock import Mock
 
-from mailbackup.manifest import ManifestManager
+from mailbackup.statistics import create_stats, StatKey
 from mailbackup.uploader import incremental_upload
 
 
 class TestIncrementalUpload:
     """Tests for incremental_upload function."""
 
-    def test_incremental_upload_no_unsynced(self, test_settings, mocker):
+    def test_incremental_upload_no_unsynced(self, test_settings, mocker, fake_manifest):
         """Test upload with no unsynced emails."""
         mocker.patch("mailbackup.uploader.db.fetch_unsynced", return_value=[])
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         incremental_upload(test_settings, manifest, stats)
 
         assert stats[StatKey.BACKED_UP] == 0
 
-    def test_incremental_upload_missing_email_file(self, test_settings, mocker):
+    def test_incremental_upload_missing_email_file(self, test_settings, mocker, fake_manifest):
         """Test upload when email file is missing."""
         row = {
             "id": 1,
@@ -45,7 +44,7 @@ class TestIncrementalUpload:
         mocker.patch("mailbackup.rclone.rclone_copyto", return_value=Mock(returncode=0))
         mocker.patch("mailbackup.rclone.rclone_moveto", return_value=Mock(returncode=0))
 
-        manifest = Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
 
         # Should handle missing file gracefully
@@ -58,18 +57,16 @@ class TestIncrementalUpload:
 class TestUploadEmailEdgeCases:
     """Tests for upload_email edge cases and error paths."""
 
-    def test_upload_email_missing_local_file(self, test_settings, mocker):
+    def test_upload_email_missing_local_file(self, test_settings, mocker, fake_manifest):
         """Test upload_email when local email file doesn't exist."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats, StatKey
         from pathlib import Path
         
         # Setup
         test_settings.tmp_dir.mkdir(parents=True, exist_ok=True)
         test_settings.maildir = Path("/nonexistent")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
@@ -93,11 +90,9 @@ class TestUploadEmailEdgeCases:
         # Should handle gracefully (email_uploaded=True for missing file)
         assert result is True
 
-    def test_upload_email_with_attachments(self, test_settings, mocker, tmp_path):
+    def test_upload_email_with_attachments(self, test_settings, mocker, tmp_path, fake_manifest):
         """Test upload_email with email that has attachments."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats
         import json
         
         # Setup
@@ -116,7 +111,7 @@ class TestUploadEmailEdgeCases:
         att_file = att_dir / "test.pdf"
         att_file.write_bytes(b"PDF content")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
@@ -131,7 +126,7 @@ class TestUploadEmailEdgeCases:
         
         # Mock operations
         mocker.patch("mailbackup.uploader.atomic_upload_file", return_value=True)
-        mocker.patch("mailbackup.uploader.remote_hash", return_value={
+        mock_remote_hash = mocker.patch("mailbackup.uploader.remote_hash", return_value={
             "/2024/2024-01-01_12-00-00_from_test@example.com_subject_Test_[abc123]/email.eml": "hash123"
         })
         mocker.patch("mailbackup.uploader.db.mark_synced")
@@ -140,14 +135,13 @@ class TestUploadEmailEdgeCases:
         # Execute
         result = upload_email(row, test_settings, manifest, stats)
         
-        # Should succeed
+        # Should succeed, verifying only email.eml rather than the whole docset folder
         assert result is True
+        assert mock_remote_hash.call_args.kwargs["file_pattern"] == "email.eml"
 
-    def test_upload_email_verification_mismatch(self, test_settings, mocker, tmp_path):
+    def test_upload_email_verification_mismatch(self, test_settings, mocker, tmp_path, fake_manifest):
         """Test upload_email when remote hash doesn't match."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats
         
         # Setup
         test_settings.tmp_dir = tmp_path / "tmp"
@@ -158,7 +152,7 @@ class TestUploadEmailEdgeCases:
         email_file = test_settings.maildir / "test.eml"
         email_file.write_text("From: test@example.com\nSubject: Test\n\nBody")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
@@ -185,11 +179,9 @@ class TestUploadEmailEdgeCases:
         # Should fail after retries
         assert result is False
 
-    def test_upload_email_no_remote_hash(self, test_settings, mocker, tmp_path):
+    def test_upload_email_no_remote_hash(self, test_settings, mocker, tmp_path, fake_manifest):
         """Test upload_email when remote_hash returns None."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats
         
         # Setup
         test_settings.tmp_dir = tmp_path / "tmp"
@@ -200,7 +192,7 @@ class TestUploadEmailEdgeCases:
         email_file = test_settings.maildir / "test.eml"
         email_file.write_text("From: test@example.com\nSubject: Test\n\nBody")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
@@ -224,11 +216,9 @@ class TestUploadEmailEdgeCases:
         # Should fail due to no remote hash
         assert result is False
 
-    def test_upload_email_atomic_upload_failure(self, test_settings, mocker, tmp_path):
+    def test_upload_email_atomic_upload_failure(self, test_settings, mocker, tmp_path, fake_manifest):
         """Test upload_email when atomic_upload_file fails."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats
         
         # Setup
         test_settings.tmp_dir = tmp_path / "tmp"
@@ -239,7 +229,7 @@ class TestUploadEmailEdgeCases:
         email_file = test_settings.maildir / "test.eml"
         email_file.write_text("From: test@example.com\nSubject: Test\n\nBody")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
@@ -261,11 +251,9 @@ class TestUploadEmailEdgeCases:
         # Should fail after retries
         assert result is False
 
-    def test_upload_email_keyerror_in_verification(self, test_settings, mocker, tmp_path):
+    def test_upload_email_keyerror_in_verification(self, test_settings, mocker, tmp_path, fake_manifest):
         """Test upload_email when verification raises KeyError."""
         from mailbackup.uploader import upload_email
-        from mailbackup.manifest import ManifestManager
-        from mailbackup.statistics import create_stats
         
         # Setup
         test_settings.tmp_dir = tmp_path / "tmp"
@@ -276,7 +264,7 @@ class TestUploadEmailEdgeCases:
         email_file = test_settings.maildir / "test.eml"
         email_file.write_text("From: test@example.com\nSubject: Test\n\nBody")
         
-        manifest = mocker.Mock(spec=ManifestManager)
+        manifest = fake_manifest
         stats = create_stats()
         
         row = {
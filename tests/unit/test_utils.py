@@ -8,18 +8,24 @@ import hashlib
 import json
 from pathlib import Path
 
+import pytest
+
 from mailbackup.statistics import StatusThread, create_stats, StatKey
 from mailbackup.utils import (
     sanitize,
     sha256,
     sha256_bytes,
+    sha256_fileobj,
     parse_mail_date,
     date_iso,
     parse_year_and_ts,
     write_json_atomic,
     safe_write_json,
+    dumps_json_bytes,
+    loads_json,
     atomic_write_text,
     unique_path_for_filename,
+    clone_file,
     load_attachments,
     build_info_json,
 )
@@ -81,6 +87,14 @@ class TestSHA256:
         expected = hashlib.sha256(b"").hexdigest()
         assert result == expected
 
+    def test_sha256_fileobj_hashes_from_current_position(self, tmp_path):
+        test_file = tmp_path / "test.txt"
+        test_file.write_bytes(b"headerbody")
+
+        with open(test_file, "rb") as f:
+            f.seek(6)
+            assert sha256_fileobj(f) == hashlib.sha256(b"body").hexdigest()
+
 
 class TestDateParsing:
     """Tests for date parsing functions."""
@@ -113,6 +127,18 @@ class TestDateParsing:
         assert isinstance(result, datetime.datetime)
         assert result.year == 2024
 
+    def test_parse_mail_date_iso_without_offset(self):
+        result = parse_mail_date("2024-01-01T12:00:00")
+        assert result.year == 2024
+
+    def test_parse_mail_date_invalid_returns_current(self):
+        result = parse_mail_date("not a valid date")
+        assert isinstance(result, datetime.datetime)
+
+    def test_parse_mail_date_empty_returns_current(self):
+        result = parse_mail_date("")
+        assert isinstance(result, datetime.datetime)
+
     def test_date_iso(self):
         date_str = "Mon, 15 Jan 2024 10:30:00 +0000"
         result = date_iso(date_str)
@@ -160,6 +186,29 @@ class TestJSONWriting:
         loaded = json.loads(test_file.read_text())
         assert loaded == data
 
+    def test_dumps_json_bytes_matches_stdlib_layout(self):
+        data = {"subject": "Grüße", "attachments": ["a.pdf"], "spam": 0, "archived_at": None}
+
+        expected = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        assert dumps_json_bytes(data) == expected
+
+    def test_dumps_json_bytes_without_orjson(self, monkeypatch):
+        monkeypatch.setattr("mailbackup.utils.orjson", None)
+        data = {"subject": "Grüße", "n": 1}
+
+        assert json.loads(dumps_json_bytes(data).decode("utf-8")) == data
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_loads_json_str_and_bytes(self, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr("mailbackup.utils.orjson", None)
+        text = '[{"Path": "2024/email.eml", "IsDir": false}]'
+
+        assert loads_json(text) == [{"Path": "2024/email.eml", "IsDir": False}]
+        assert loads_json(text.encode()) == loads_json(text)
+        with pytest.raises(json.JSONDecodeError):
+            loads_json("{invalid json}")
+
     def test_atomic_write_text_string(self, tmp_path):
         test_file = tmp_path / "test.txt"
         content = "Hello, World!"
@@ -204,6 +253,45 @@ class TestUniquePathForFilename:
         assert result == tmp_path / "test-3.txt"
 
 
+class TestCloneFile:
+    """Tests for clone_file function."""
+
+    def test_clone_file_hardlinks_on_same_filesystem(self, tmp_path):
+        src = tmp_path / "src.pdf"
+        src.write_bytes(b"PDF content")
+        dst = tmp_path / "dst.pdf"
+
+        clone_file(src, dst)
+
+        assert dst.read_bytes() == b"PDF content"
+        assert dst.stat().st_ino == src.stat().st_ino
+
+    def test_clone_file_replaces_existing_destination(self, tmp_path):
+        src = tmp_path / "src.pdf"
+        src.write_bytes(b"new")
+        dst = tmp_path / "dst.pdf"
+        dst.write_bytes(b"old")
+
+        clone_file(src, dst)
+
+        assert dst.read_bytes() == b"new"
+
+    def test_clone_file_copies_when_link_fails(self, tmp_path, mocker):
+        mocker.patch("mailbackup.utils.os.link", side_effect=OSError(18, "Invalid cross-device link"))
+        src = tmp_path / "src.pdf"
+        src.write_bytes(b"PDF content")
+        dst = tmp_path / "dst.pdf"
+
+        clone_file(src, dst)
+
+        assert dst.read_bytes() == b"PDF content"
+        assert dst.stat().st_ino != src.stat().st_ino
+
+    def test_clone_file_missing_source(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            clone_file(tmp_path / "missing.pdf", tmp_path / "dst.pdf")
+
+
 class TestLoadAttachments:
     """Tests for load_attachments function."""
 
@@ -230,6 +318,17 @@ class TestLoadAttachments:
         result = load_attachments('{"not": "a list"}')
         assert result == []
 
+    def test_load_attachments_empty_list_skips_parser(self, mocker):
+        mock_loads = mocker.patch("mailbackup.utils.json.loads")
+        assert load_attachments("[]") == []
+        mock_loads.assert_not_called()
+
+    def test_load_attachments_without_orjson(self, monkeypatch):
+        monkeypatch.setattr("mailbackup.utils.orjson", None)
+        result = load_attachments('["/path/a.pdf"]')
+        assert result == [Path("/path/a.pdf")]
+        assert load_attachments("{invalid json}") == []
+
 
 class TestBuildInfoJson:
     """Tests for build_info_json function."""
@@ -335,49 +434,6 @@ class TestAtomicOperations:
         assert file_path.read_text() == "Line 1\nLine 2\nLine 3\n"
 
 
-class TestDateParsing:
-    """Tests for date parsing functions."""
-
-    def test_parse_mail_date_rfc2822(self):
-        """Test parse_mail_date with RFC 2822 format."""
-        from mailbackup.utils import parse_mail_date
-        
-        date_str = "Mon, 1 Jan 2024 12:00:00 +0000"
-        result = parse_mail_date(date_str)
-        
-        assert result is not None
-        assert result.year == 2024
-
-    def test_parse_mail_date_iso_format(self):
-        """Test parse_mail_date with ISO format."""
-        from mailbackup.utils import parse_mail_date
-        
-        date_str = "2024-01-01T12:00:00"
-        result = parse_mail_date(date_str)
-        
-        assert result is not None
-        assert result.year == 2024
-
-    def test_parse_mail_date_invalid(self):
-        """Test parse_mail_date with invalid date."""
-        from mailbackup.utils import parse_mail_date
-        
-        date_str = "not a valid date"
-        result = parse_mail_date(date_str)
-        
-        # Should return current time
-        assert result is not None
-
-    def test_parse_mail_date_empty(self):
-        """Test parse_mail_date with empty string."""
-        from mailbackup.utils import parse_mail_date
-        
-        result = parse_mail_date("")
-        
-        # Should return current time
-        assert result is not None
-
-
 class TestRemoteHashOperations:
     """Tests for remote hash computation."""
 